@@ -139,7 +139,7 @@ class TaskManager:
                 "message": "无进度信息"
             }
             
-        progress_data = task_progress.get_progress()
+        progress_data = task_progress.get_progress_view()
         
         # 返回进度信息
         return {
@@ -255,23 +255,15 @@ class TaskManager:
         prompt = task["prompt"]
         options = task["options"]
         
-        # 创建任务的共享数据
+        # 创建任务的共享数据，流程节点直接通过其中的跟踪器更新进度
         shared = {
             "task_id": task_id,
             "prompt": prompt,
             "options": options.copy(),
+            "progress_tracker": progress_tracker,
             "result": None
         }
         
-        # 创建任务进度更新回调
-        def progress_callback(data):
-            progress = data.get("progress", 0)
-            message = data.get("message", "")
-            update_progress(task_id, progress, message)
-            
-        # 订阅进度更新
-        progress_tracker.subscribe(task_id, progress_callback)
-        
         # 创建故事生成流程
         flow = self.flow_factory.create_story_flow()
         
@@ -41,6 +41,8 @@ class TaskManager:
         self.running_tasks: Dict[str, asyncio.Task] = {}
         self.webhooks: Dict[str, Set[Callable[[str, Any], Awaitable[None]]]] = {}
         self.flow_factory = StoryFlowFactory()
+        # 处理进度订阅回调的事件循环，首次订阅时记录
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         
     async def handle_task_send(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -119,8 +121,9 @@ class TaskManager:
                 self.webhooks[task_id] = set()
             self.webhooks[task_id].add(send_update)
             
-            # 创建进度跟踪订阅
-            await progress_tracker.subscribe(task_id, self._on_progress_update)
+            # 创建进度跟踪订阅，回调在后台线程中触发，需要转交回当前事件循环
+            self._loop = asyncio.get_running_loop()
+            progress_tracker.subscribe(task_id, self._on_progress_notify)
             
             # 立即发送当前状态
             await send_update({
@@ -656,6 +659,17 @@ class TaskManager:
             logger.error(f"任务超时处理时出错: {str(e)}")
             traceback.print_exc()
     
+    def _on_progress_notify(self, progress) -> None:
+        """
+        进度跟踪器的订阅回调，在后台分发线程中执行
+        
+        不直接操作事件循环中的对象，把处理协程提交给订阅时的事件循环
+        
+        Args:
+            progress: 任务进度
+        """
+        asyncio.run_coroutine_threadsafe(self._on_progress_update(progress), self._loop)
+    
     async def _on_progress_update(self, progress: TaskProgress) -> None:
         """
         进度更新回调
@@ -185,7 +185,10 @@ async def delete_task(task_id: str):
 
 # 任务进度更新回调
 def progress_callback(update_data):
-    """处理进度更新"""
+    """处理进度更新
+    
+    修改任务状态，必须在事件循环线程中调用（见process_task中的订阅）
+    """
     task_id = update_data.get("task_id")
     if not task_id or task_id not in tasks:
         return
@@ -223,7 +226,7 @@ def progress_callback(update_data):
         task.messages.append(new_message)
     
     # 通知订阅者（异步方式）
-    notify_subscribers(task_id, update_data)
+    asyncio.create_task(notify_subscribers(task_id, update_data))
 
 async def notify_subscribers(task_id, update_data):
     """通知订阅者进度更新"""
@@ -252,7 +255,11 @@ async def process_task(task_id, task_input):
         
         # 创建进度跟踪器
         task_progress = progress_tracker.create_task(task_id)
-        task_progress.subscribe(progress_callback)
+        # 进度回调在后台分发线程中触发，转交给事件循环后再修改任务状态
+        loop = asyncio.get_running_loop()
+        task_progress.subscribe(
+            lambda update_data: loop.call_soon_threadsafe(progress_callback, update_data)
+        )
         
         # 创建共享存储
         shared = create_shared_store(task_id, task_input, task_progress)
@@ -25,6 +25,11 @@ MCP_SERVICE_TIMEOUT = int(os.environ.get("MCP_SERVICE_TIMEOUT", "30"))
 MAX_RETRIES = int(os.environ.get("MAX_RETRIES", "3"))
 RETRY_WAIT_TIME = int(os.environ.get("RETRY_WAIT_TIME", "2"))
 
+# 节点重试退避配置（指数退避 + 随机抖动）
+RETRY_BACKOFF_BASE = float(os.environ.get("RETRY_BACKOFF_BASE", "0.25"))    # 秒
+RETRY_BACKOFF_CAP = float(os.environ.get("RETRY_BACKOFF_CAP", "10.0"))      # 秒
+RETRY_BACKOFF_JITTER = float(os.environ.get("RETRY_BACKOFF_JITTER", "0.25"))  # 秒
+
 # LLM配置（用于本地LLM功能）
 LLM_MODEL = os.environ.get("LLM_MODEL", "gpt-4o")
 LLM_TEMPERATURE = float(os.environ.get("LLM_TEMPERATURE", "0.7"))
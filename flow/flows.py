@@ -44,9 +44,9 @@ class StoryFlowFactory:
             AsyncFlow: 故事生成流程
         """
         # 创建各个节点
-        planning_node = StoryPlanningNode(max_retries=3, wait=2)
-        writing_node = StoryWritingNode(max_retries=3, wait=2)
-        editing_node = StoryEditingNode(max_retries=3, wait=2)
+        planning_node = StoryPlanningNode(max_retries=3)
+        writing_node = StoryWritingNode(max_retries=3)
+        editing_node = StoryEditingNode(max_retries=3)
         error_node = ErrorHandlingNode(max_retries=1)
         
         # 连接各个节点
@@ -76,7 +76,7 @@ class StoryFlowFactory:
             AsyncFlow: 故事规划流程
         """
         # 创建节点
-        planning_node = StoryPlanningNode(max_retries=3, wait=2)
+        planning_node = StoryPlanningNode(max_retries=3)
         error_node = ErrorHandlingNode(max_retries=1)
         
         # 连接节点
@@ -97,7 +97,7 @@ class StoryFlowFactory:
             AsyncFlow: 故事写作流程
         """
         # 创建节点
-        writing_node = StoryWritingNode(max_retries=3, wait=2)
+        writing_node = StoryWritingNode(max_retries=3)
         error_node = ErrorHandlingNode(max_retries=1)
         
         # 连接节点
@@ -118,7 +118,7 @@ class StoryFlowFactory:
             AsyncFlow: 故事编辑流程
         """
         # 创建节点
-        editing_node = StoryEditingNode(max_retries=3, wait=2)
+        editing_node = StoryEditingNode(max_retries=3)
         error_node = ErrorHandlingNode(max_retries=1)
         
         # 连接节点
@@ -139,12 +139,12 @@ class StoryFlowFactory:
             AsyncFlow: 配置好的故事生成流程
         """
         # 创建各个节点
-        tool_discovery = ToolDiscoveryNode(max_retries=2, wait=2)
-        search_node = SearchNode(max_retries=2, wait=2)
-        outline_node = OutlineNode(max_retries=2, wait=2)
-        planning_node = StoryPlanningNode(max_retries=3, wait=2)
-        writing_node = StoryWritingNode(max_retries=3, wait=2)
-        editing_node = StoryEditingNode(max_retries=3, wait=2)
+        tool_discovery = ToolDiscoveryNode(max_retries=2)
+        search_node = SearchNode(max_retries=2)
+        outline_node = OutlineNode(max_retries=2)
+        planning_node = StoryPlanningNode(max_retries=3)
+        writing_node = StoryWritingNode(max_retries=3)
+        editing_node = StoryEditingNode(max_retries=3)
         error_node = ErrorHandlingNode(max_retries=1)
         
         # 连接节点 - 基本流程
@@ -7,10 +7,15 @@
 import os
 import sys
 import asyncio
+import contextvars
 import json
+import random
 from typing import Dict, List, Any, Optional, Union
 import traceback
 import uuid
+from dataclasses import dataclass, field
+
+import orjson
 
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -20,24 +25,118 @@ from pocketflow import Node, AsyncNode, AsyncParallelBatchNode, Flow, AsyncFlow
 
 # 导入项目模块
 from utils.logging import get_logger, log_async_function_call
-from utils.progress import update_progress
+from utils.progress import update_progress, TaskProgress
 from utils.llm import generate_text, generate_streaming
 from mcp.client import get_tools, call_tool, check_service_health, MCPClient, MCPClientException
-from config import MAX_RETRIES
+from config import MAX_RETRIES, RETRY_BACKOFF_BASE, RETRY_BACKOFF_CAP, RETRY_BACKOFF_JITTER
 from a2a.schema import AgentRole, MessageType, StoryOutline, StorySection
 
 logger = get_logger(__name__)
 
+# 传给大纲生成的搜索上下文长度上限（字符）
+SEARCH_CONTEXT_MAX_PER_QUERY = 2048
+SEARCH_CONTEXT_MAX_TOTAL = 6144
+
+# 当前节点运行挂起的后台进度更新任务
+# PocketFlow每次运行只浅拷贝节点，实例属性会在并发运行之间共享，因此按运行上下文保存
+_pending_progress: contextvars.ContextVar[Optional[set]] = contextvars.ContextVar(
+    "pending_progress", default=None
+)
+
 class BaseStoryNode(AsyncNode):
     """
     故事生成基础节点
     提供通用功能
     """
     
+    # 单次运行中同时挂起的进度更新任务上限
+    MAX_PENDING_PROGRESS = 32
+    
+    def __init__(self, max_retries=1, base=RETRY_BACKOFF_BASE,
+                 cap=RETRY_BACKOFF_CAP, jitter=RETRY_BACKOFF_JITTER):
+        """
+        初始化节点
+        
+        Args:
+            max_retries: 最大重试次数
+            base: 退避基础等待时间(秒)
+            cap: 单次等待时间上限(秒)
+            jitter: 随机抖动上限(秒)
+        """
+        super().__init__(max_retries=max_retries)
+        self.base = base
+        self.cap = cap
+        self.jitter = jitter
+    
+    def retry_delay(self, attempt):
+        """
+        计算第attempt次失败后的等待时间（指数退避 + 随机抖动）
+        
+        Args:
+            attempt: 已失败的次数，从0开始
+            
+        Returns:
+            等待时间(秒)
+        """
+        return min(self.cap, self.base * (2 ** attempt)) + random.uniform(0, self.jitter)
+    
+    async def _exec(self, prep_res):
+        """执行阶段的重试循环，使用指数退避代替固定等待时间"""
+        for self.cur_retry in range(self.max_retries):
+            try:
+                return await self.exec_async(prep_res)
+            except Exception as e:
+                if self.cur_retry == self.max_retries - 1:
+                    return await self.exec_fallback_async(prep_res, e)
+                await asyncio.sleep(self.retry_delay(self.cur_retry))
+    
+    async def _run_async(self, shared):
+        """运行节点，结束前等待本次运行的后台进度更新完成"""
+        token = _pending_progress.set(set())
+        try:
+            return await super()._run_async(shared)
+        finally:
+            await self.drain_progress()
+            _pending_progress.reset(token)
+    
+    def _bg(self, coro):
+        """
+        在后台运行协程，不阻塞当前执行路径
+        
+        任务记录在当前运行的上下文中，并发运行的同一节点互不影响。
+        任务按创建顺序由事件循环调度，因此进度更新的先后顺序保持不变。
+        挂起任务达到上限时丢弃本次更新（后续更新会覆盖它）。
+        
+        Args:
+            coro: 要运行的协程
+        """
+        pending = _pending_progress.get()
+        if pending is None:
+            # 不经过_run_async直接调用时，在当前上下文中单独记录
+            pending = set()
+            _pending_progress.set(pending)
+            
+        if len(pending) >= self.MAX_PENDING_PROGRESS:
+            logger.debug("进度更新任务过多，丢弃本次更新")
+            coro.close()
+            return
+            
+        task = asyncio.create_task(coro)
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    
+    async def drain_progress(self):
+        """等待当前运行的后台进度更新完成"""
+        pending = _pending_progress.get()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    
     async def update_progress(self, shared, progress, message, artifacts=None):
         """
         更新任务进度
         
+        共享存储中的跟踪器可以是单个任务的TaskProgress，也可以是ProgressTracker
+        
         Args:
             shared: 共享存储
             progress: 进度(0.0-1.0)
@@ -50,10 +149,16 @@ class BaseStoryNode(AsyncNode):
             return
             
         tracker = shared.get("progress_tracker")
-        if tracker:
-            tracker.update_progress(task_id, progress, message, artifacts)
-        else:
+        if not tracker:
             logger.warning("无法更新进度：缺少progress_tracker")
+            return
+            
+        # 节点按0-1报告进度，跟踪器使用百分比
+        percent = progress * 100
+        if isinstance(tracker, TaskProgress):
+            tracker.update(progress=percent, message=message, extra_data=artifacts)
+        else:
+            tracker.update_progress(task_id, progress=percent, message=message, extra_data=artifacts)
     
     async def get_mcp_tools(self, shared, service_type):
         """
@@ -160,7 +265,7 @@ class ToolDiscoveryNode(BaseStoryNode):
         
         # 更新进度
         message = f"发现了{len(available_services)}种可用服务"
-        await self.update_progress(shared, 0.1, message)
+        self._bg(self.update_progress(shared, 0.1, message))
         
         # 决定下一步
         if not available_services:
@@ -188,7 +293,7 @@ class SearchNode(BaseStoryNode):
     async def prep_async(self, shared):
         """准备阶段：获取搜索查询"""
         # 获取用户输入
-        inputs = shared.get("inputs", {})
+        inputs = shared.get("inputs") or {}
         prompt = inputs.get("prompt", "")
         
         # 检查是否已有搜索查询
@@ -276,7 +381,7 @@ class SearchNode(BaseStoryNode):
         
         # 更新进度
         message = f"完成了{len(queries)}个搜索查询"
-        await self.update_progress(shared, 0.2, message)
+        self._bg(self.update_progress(shared, 0.2, message))
         
         return "default"
     
@@ -294,18 +399,29 @@ class OutlineNode(BaseStoryNode):
     async def prep_async(self, shared):
         """准备阶段：获取搜索结果和用户输入"""
         # 获取用户输入
-        inputs = shared.get("inputs", {})
+        inputs = shared.get("inputs") or {}
         prompt = inputs.get("prompt", "")
         
-        # 获取搜索结果
+        # 获取搜索结果，按查询和总量截断以控制LLM输入长度
         search_results = shared.get("search_results", {})
-        search_context = ""
+        parts = []
+        budget = SEARCH_CONTEXT_MAX_TOTAL
         
         for query, result in search_results.items():
             if isinstance(result, dict) and "text" in result:
-                search_context += f"关于\"{query}\"的信息:\n{result['text']}\n\n"
+                text = result["text"] or ""
             elif isinstance(result, str):
-                search_context += f"关于\"{query}\"的信息:\n{result}\n\n"
+                text = result
+            else:
+                continue
+                
+            snippet = text[:min(SEARCH_CONTEXT_MAX_PER_QUERY, budget)]
+            parts.append(f"关于\"{query}\"的信息:\n{snippet}\n\n")
+            budget -= len(snippet)
+            if budget <= 0:
+                break
+                
+        search_context = "".join(parts)
                 
         # 存储shared以便在exec_async中使用
         self._shared = shared
@@ -325,6 +441,8 @@ class OutlineNode(BaseStoryNode):
             return {"title": "未能生成大纲", "sections": []}
             
         prompt, search_context, mode = inputs
+        options = self._shared.get("options") or {}
+        style = options.get("style", "general")
         
         try:
             if mode == "mcp":
@@ -335,7 +453,7 @@ class OutlineNode(BaseStoryNode):
                         {
                             "prompt": prompt,
                             "context": search_context,
-                            "style": self._shared.get("options", {}).get("style", "general"),
+                            "style": style,
                             "sections_count": 5  # 默认5个章节
                         },
                         self._shared.get("mcp_service_url")
@@ -411,7 +529,7 @@ class OutlineNode(BaseStoryNode):
         # 更新进度
         sections_count = len(shared["outline"]["sections"])
         message = f"生成了包含{sections_count}个章节的大纲: {shared['outline']['title']}"
-        await self.update_progress(shared, 0.3, message, {"outline": shared["outline"]})
+        self._bg(self.update_progress(shared, 0.3, message, {"outline": shared["outline"]}))
         
         return "default"
     
@@ -429,20 +547,20 @@ class OutlineNode(BaseStoryNode):
             "error": str(exc)
         }
 
-class StoryPlanningNode(AsyncNode):
+class StoryPlanningNode(BaseStoryNode):
     """故事规划节点
     
     根据用户提示生成故事大纲
     """
     
-    def __init__(self, max_retries=3, wait=2):
+    def __init__(self, max_retries=3, **backoff):
         """初始化故事规划节点
         
         Args:
             max_retries: 最大重试次数
-            wait: 重试等待时间(秒)
+            backoff: 重试退避参数(base/cap/jitter)，见BaseStoryNode
         """
-        super().__init__(max_retries=max_retries, wait=wait)
+        super().__init__(max_retries=max_retries, **backoff)
         self.mcp_client = MCPClient()
     
     async def prep_async(self, shared):
@@ -625,20 +743,20 @@ class StoryPlanningNode(AsyncNode):
         
         return "default"
 
-class StoryWritingNode(AsyncNode):
+class StoryWritingNode(BaseStoryNode):
     """故事写作节点
     
     根据故事大纲生成故事内容
     """
     
-    def __init__(self, max_retries=3, wait=2):
+    def __init__(self, max_retries=3, **backoff):
         """初始化故事写作节点
         
         Args:
             max_retries: 最大重试次数
-            wait: 重试等待时间(秒)
+            backoff: 重试退避参数(base/cap/jitter)，见BaseStoryNode
         """
-        super().__init__(max_retries=max_retries, wait=wait)
+        super().__init__(max_retries=max_retries, **backoff)
         self.mcp_client = MCPClient()
     
     async def prep_async(self, shared):
@@ -695,24 +813,29 @@ class StoryWritingNode(AsyncNode):
         title = prep_res.get("title")
         outline = prep_res.get("outline")
         prompt = prep_res.get("prompt")
-        options = prep_res.get("options", {})
+        options = prep_res.get("options") or {}
+        style = options.get("style", "general")
+        tone = options.get("tone", "neutral")
+        length = options.get("length", "medium")
         
         # 更新进度
-        await self.update_progress(
+        self._bg(self.update_progress(
             {"task_id": task_id, "progress_tracker": prep_res.get("progress_tracker")}, 
             0.45, 
             "正在生成故事内容"
-        )
+        ))
         
         try:
+            outline_str = orjson.dumps(outline).decode() if isinstance(outline, dict) else outline
+            
             # 准备MCP调用参数
             tool_params = {
                 "title": title,
-                "outline": json.dumps(outline) if isinstance(outline, dict) else outline,
+                "outline": outline_str,
                 "prompt": prompt,
-                "style": options.get("style", "general"),
-                "tone": options.get("tone", "neutral"),
-                "length": options.get("length", "medium")
+                "style": style,
+                "tone": tone,
+                "length": length
             }
             
             # 调用MCP工具生成故事内容
@@ -729,23 +852,23 @@ class StoryWritingNode(AsyncNode):
                 logger.warning("MCP服务没有返回内容，尝试使用备用方法")
                 
                 # 使用本地LLM生成内容
-                system_message = f"""
-                你是一个创意故事写作者。根据以下大纲写一个完整的故事。
-                标题: {title}
-                大纲: {json.dumps(outline, ensure_ascii=False) if isinstance(outline, dict) else outline}
-                写作风格: {options.get("style", "general")}
-                语调: {options.get("tone", "neutral")}
-                长度: {options.get("length", "medium")}
-                """
+                system_message = "\n".join([
+                    "你是一个创意故事写作者。根据以下大纲写一个完整的故事。",
+                    f"标题: {title}",
+                    f"大纲: {outline_str}",
+                    f"写作风格: {style}",
+                    f"语调: {tone}",
+                    f"长度: {length}"
+                ])
                 
                 content = await generate_text(prompt, system_message, max_tokens=2000)
                 
             # 更新进度
-            await self.update_progress(
+            self._bg(self.update_progress(
                 {"task_id": task_id, "progress_tracker": prep_res.get("progress_tracker")}, 
                 0.7, 
                 "故事内容生成完成"
-            )
+            ))
             
             return {
                 "content": content
@@ -803,20 +926,20 @@ class StoryWritingNode(AsyncNode):
         
         return "default"
 
-class StoryEditingNode(AsyncNode):
+class StoryEditingNode(BaseStoryNode):
     """故事编辑节点
     
     对生成的故事内容进行润色和改进
     """
     
-    def __init__(self, max_retries=3, wait=2):
+    def __init__(self, max_retries=3, **backoff):
         """初始化故事编辑节点
         
         Args:
             max_retries: 最大重试次数
-            wait: 重试等待时间(秒)
+            backoff: 重试退避参数(base/cap/jitter)，见BaseStoryNode
         """
-        super().__init__(max_retries=max_retries, wait=wait)
+        super().__init__(max_retries=max_retries, **backoff)
         self.mcp_client = MCPClient()
     
     async def prep_async(self, shared):
@@ -872,18 +995,18 @@ class StoryEditingNode(AsyncNode):
         options = prep_res["options"]
         
         # 更新进度
-        await self.update_progress(
+        self._bg(self.update_progress(
             {"task_id": task_id, "progress_tracker": prep_res.get("progress_tracker")}, 
             0.85, 
             "正在润色故事"
-        )
+        ))
         
         try:
             # 准备MCP调用参数
             tool_params = {
                 "title": title,
                 "content": content,
-                "outline": json.dumps(outline) if isinstance(outline, dict) else outline,
+                "outline": orjson.dumps(outline).decode() if isinstance(outline, dict) else outline,
                 "edit_level": options.get("edit_level", "moderate"),
                 "focus": options.get("focus", "grammar,coherence,flow")
             }
@@ -910,11 +1033,11 @@ class StoryEditingNode(AsyncNode):
                 suggestions = ["故事已完成基本编辑"]
             
             # 更新进度
-            await self.update_progress(
+            self._bg(self.update_progress(
                 {"task_id": task_id, "progress_tracker": prep_res.get("progress_tracker")}, 
                 0.95, 
                 "故事润色完成"
-            )
+            ))
             
             return {
                 "edited_content": edited_content,
@@ -984,6 +1107,22 @@ class StoryEditingNode(AsyncNode):
         
         return "default"
 
+# 部分结果缺失字段的占位内容
+FALLBACK_TITLE = "故事生成失败"
+FALLBACK_OUTLINE = "无法生成故事大纲"
+FALLBACK_CONTENT = "无法生成故事内容"
+
+@dataclass(slots=True)
+class ErrorPrep:
+    """错误处理节点准备阶段的结果"""
+    
+    task_id: Optional[str]
+    error: Any
+    title: Optional[str] = None
+    outline: Any = None
+    content: Optional[str] = None
+    options: Dict[str, Any] = field(default_factory=dict)
+
 class ErrorHandlingNode(AsyncNode):
     """错误处理节点
     
@@ -1010,17 +1149,17 @@ class ErrorHandlingNode(AsyncNode):
         # 获取任务ID
         task_id = shared.get("task_id")
         if not task_id:
-            return {"error": "未找到任务ID"}
+            return ErrorPrep(task_id=None, error="未找到任务ID")
             
         # 获取当前状态
-        return {
-            "task_id": task_id,
-            "error": shared.get("error"),
-            "title": shared.get("title"),
-            "outline": shared.get("outline"),
-            "content": shared.get("content"),
-            "options": shared.get("options", {})
-        }
+        return ErrorPrep(
+            task_id=task_id,
+            error=shared.get("error"),
+            title=shared.get("title"),
+            outline=shared.get("outline"),
+            content=shared.get("content"),
+            options=shared.get("options") or {}
+        )
     
     async def exec_async(self, prep_res):
         """执行错误处理
@@ -1031,8 +1170,8 @@ class ErrorHandlingNode(AsyncNode):
         Returns:
             处理结果
         """
-        task_id = prep_res["task_id"]
-        error = prep_res["error"]
+        task_id = prep_res.task_id
+        error = prep_res.error
         
         # 记录错误
         logger.error(f"处理任务 {task_id} 错误: {error}")
@@ -1041,28 +1180,23 @@ class ErrorHandlingNode(AsyncNode):
         update_progress(task_id, 0, f"发生错误: {error}", "failed")
         
         # 检查是否已有部分结果可以返回
-        title = prep_res.get("title")
-        outline = prep_res.get("outline")
-        content = prep_res.get("content")
-        
-        has_partial_results = title or outline or content
+        title = prep_res.title
+        outline = prep_res.outline
+        content = prep_res.content
         
-        if has_partial_results:
-            return {
-                "retry": False,
-                "error": error,
-                "partial_results": {
-                    "title": title or "故事生成失败",
-                    "outline": outline or "无法生成故事大纲",
-                    "content": content or "无法生成故事内容"
-                }
-            }
-        else:
+        if not (title or outline or content):
             # 没有部分结果，尝试重试
-            return {
-                "retry": True,
-                "error": error
+            return {"retry": True, "error": error}
+            
+        return {
+            "retry": False,
+            "error": error,
+            "partial_results": {
+                "title": title or FALLBACK_TITLE,
+                "outline": outline or FALLBACK_OUTLINE,
+                "content": content or FALLBACK_CONTENT
             }
+        }
     
     async def post_async(self, shared, prep_res, exec_res):
         """处理错误处理结果
@@ -1075,7 +1209,7 @@ class ErrorHandlingNode(AsyncNode):
         Returns:
             下一个动作
         """
-        task_id = prep_res["task_id"]
+        task_id = prep_res.task_id
         retry = exec_res["retry"]
         error = exec_res["error"]
         
@@ -4,12 +4,16 @@
 定义系统中的共享数据结构
 """
 
-from typing import Dict, List, Any, Optional
-import json
+from typing import Dict, List, Any, Optional, Mapping
+from types import MappingProxyType
+
+import orjson
 
 class SharedStore:
     """共享存储类，用于在流程间传递数据"""
     
+    __slots__ = ("_data",)
+    
     def __init__(self, initial_data: Optional[Dict[str, Any]] = None):
         """
         初始化共享存储
@@ -44,13 +48,21 @@ class SharedStore:
         """清空所有数据"""
         self._data.clear()
     
-    def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
+    def to_dict(self) -> Mapping[str, Any]:
+        """
+        获取只读字典视图
+        
+        不复制数据，视图会反映之后对存储的修改；需要独立副本时使用to_mutable_dict
+        """
+        return MappingProxyType(self._data)
+    
+    def to_mutable_dict(self) -> Dict[str, Any]:
+        """转换为可修改的字典副本"""
         return self._data.copy()
     
     def to_json(self) -> str:
         """转换为JSON字符串"""
-        return json.dumps(self._data, ensure_ascii=False)
+        return orjson.dumps(self._data).decode()
     
     def __getitem__(self, key):
         """支持字典风格访问: shared[key]"""
@@ -72,43 +84,51 @@ class SharedStore:
         """字符串表示"""
         return f"SharedStore({self._data})"
 
-# 默认共享存储结构
-DEFAULT_SHARED_STORE = {
-    # 任务信息
-    "task_id": None,             # 任务ID
-    "prompt": "",                # 用户故事提示
-    "options": {                 # 故事生成选项
-        "style": "general",      # 风格 (sci-fi, fantasy, mystery, etc)
-        "length": "medium",      # 长度 (short, medium, long)
-        "tone": "neutral"        # 语调 (dramatic, humorous, serious, etc)
-    },
-    "progress": 0.0,             # 当前进度 (0.0-1.0)
-    "progress_tracker": None,    # 进度跟踪器
-    
-    # 服务与工具
-    "mcp_service_url": None,     # MCP服务URL
-    "available_services": [],    # 可用服务列表
-    "mcp_tools": {},             # 服务类型 -> 工具列表的映射
-    
-    # 搜索相关
-    "search_queries": [],         # 已执行的搜索查询
-    "search_results": {},         # 查询 -> 结果的映射
-    
-    # 大纲相关
-    "title": "",                  # 故事标题
-    "outline": {                  # 故事大纲
-        "title": "",              # 标题
-        "sections": []            # 章节列表
-    },
-    
-    # 内容相关
-    "content": "",                # 故事内容
-    "sections": [],               # 章节内容列表
-    
-    # 结果
-    "result": None,               # 最终结果
-    "error": None                 # 错误信息
-}
+def _default_shared_store() -> Dict[str, Any]:
+    """
+    创建默认共享存储结构
+    
+    每次调用都返回新的字典，嵌套的options/outline等可变对象不会在任务间共享
+    
+    Returns:
+        默认共享存储数据
+    """
+    return {
+        # 任务信息
+        "task_id": None,             # 任务ID
+        "prompt": "",                # 用户故事提示
+        "options": {                 # 故事生成选项
+            "style": "general",      # 风格 (sci-fi, fantasy, mystery, etc)
+            "length": "medium",      # 长度 (short, medium, long)
+            "tone": "neutral"        # 语调 (dramatic, humorous, serious, etc)
+        },
+        "progress": 0.0,             # 当前进度 (0.0-1.0)
+        "progress_tracker": None,    # 进度跟踪器
+    
+        # 服务与工具
+        "mcp_service_url": None,     # MCP服务URL
+        "available_services": [],    # 可用服务列表
+        "mcp_tools": {},             # 服务类型 -> 工具列表的映射
+    
+        # 搜索相关
+        "search_queries": [],         # 已执行的搜索查询
+        "search_results": {},         # 查询 -> 结果的映射
+    
+        # 大纲相关
+        "title": "",                  # 故事标题
+        "outline": {                  # 故事大纲
+            "title": "",              # 标题
+            "sections": []            # 章节列表
+        },
+    
+        # 内容相关
+        "content": "",                # 故事内容
+        "sections": [],               # 章节内容列表
+    
+        # 结果
+        "result": None,               # 最终结果
+        "error": None                 # 错误信息
+    }
 
 def create_shared_store(task_id: str, inputs: Dict[str, Any], 
                       progress_tracker=None) -> SharedStore:
@@ -123,7 +143,7 @@ def create_shared_store(task_id: str, inputs: Dict[str, Any],
     Returns:
         初始化的共享存储
     """
-    shared_data = DEFAULT_SHARED_STORE.copy()
+    shared_data = _default_shared_store()
     
     # 更新任务信息
     shared_data["task_id"] = task_id
@@ -8,27 +8,65 @@ import os
 import sys
 import json
 import time
+import random
 import asyncio
 import logging
 import traceback
-from typing import Dict, List, Any, Optional, Callable, Union, Tuple
+from typing import Dict, List, Any, Optional, Callable, Union, Tuple, AsyncIterator
 
 import aiohttp
-import requests
+import orjson
 
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from mcp.config import (
     get_mcp_service_url, get_service_url, get_auth_headers,
-    get_request_timeout, get_max_retries, get_all_services
+    get_request_timeout, get_max_retries, get_retry_interval, get_all_services
 )
 from utils.logging import get_logger, log_function_call, log_async_function_call
 
 logger = get_logger(__name__)
 
+# 工具列表缓存有效期(秒)
+TOOLS_CACHE_TTL = 60.0
+
+# 单次重试等待时间上限(秒)
+MAX_RETRY_WAIT = 30.0
+
+# 不可重试的HTTP状态码，重试也无法恢复
+NON_RETRYABLE_STATUS = frozenset({400, 401, 403, 404, 422})
+
+# 重试总耗时上限，为服务请求超时时间的倍数
+RETRY_BUDGET_FACTOR = 3
+
+# 超时设置缓存: 秒数 -> ClientTimeout（不可变，可共享）
+_TIMEOUT_CACHE: Dict[float, aiohttp.ClientTimeout] = {}
+
+def _timeout_for(seconds: float) -> aiohttp.ClientTimeout:
+    """获取指定秒数的超时设置
+    
+    Args:
+        seconds: 总超时时间(秒)
+        
+    Returns:
+        aiohttp.ClientTimeout: 超时设置
+    """
+    timeout = _TIMEOUT_CACHE.get(seconds)
+    if timeout is None:
+        timeout = _TIMEOUT_CACHE.setdefault(seconds, aiohttp.ClientTimeout(total=seconds))
+    return timeout
+
 class MCPClientException(Exception):
     """MCP客户端异常"""
-    pass
+    
+    def __init__(self, message: str = "", status: Optional[int] = None):
+        """
+        Args:
+            message: 错误信息
+            status: 导致异常的HTTP状态码，非HTTP错误时为None
+        """
+        super().__init__(message)
+        self.status = status
 
 class ToolNotFoundException(MCPClientException):
     """工具未找到异常"""
@@ -47,18 +85,31 @@ class MCPClient:
     
     def __init__(self, 
                  service_name: Optional[str] = None,
-                 api_key: Optional[str] = None):
+                 api_key: Optional[str] = None,
+                 tools_ttl: float = TOOLS_CACHE_TTL):
         """初始化MCP客户端
         
         Args:
             service_name: 服务名称，如果为None则使用默认服务
             api_key: MCP服务API密钥，如果为None则使用配置中的API密钥
+            tools_ttl: 工具列表缓存有效期(秒)
         """
         self.service_name = service_name
         self.api_key = api_key
         
-        # 创建会话字典，为每个服务保留一个会话
-        self.sessions = {}
+        # 预先计算请求头和各服务的端点地址
+        self._headers = get_auth_headers()
+        if api_key:
+            self._headers["Authorization"] = f"Bearer {api_key}"
+        self._endpoints: Dict[Optional[str], Dict[str, str]] = {}
+        
+        # 所有服务共用一个会话，复用连接池
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+        
+        # 工具列表缓存: 服务名称 -> (获取时间, 工具列表)
+        self._tools_cache: Dict[str, Tuple[float, Tuple[Dict[str, Any], ...]]] = {}
+        self._tools_ttl = tools_ttl
         
         logger.info(f"初始化MCP客户端: {service_name if service_name else '默认'}")
     
@@ -85,6 +136,23 @@ class MCPClient:
             
         return url
     
+    def _get_endpoints(self, service_name: Optional[str] = None) -> Dict[str, str]:
+        """获取服务的端点地址
+        
+        Args:
+            service_name: 服务名称，如果为None则使用初始化时的服务名称
+            
+        Returns:
+            Dict[str, str]: 工具列表端点(tools)和工具调用端点前缀(run)
+        """
+        name = service_name or self.service_name
+        endpoints = self._endpoints.get(name)
+        if endpoints is None:
+            service_url = self._get_service_url(name)
+            endpoints = {"tools": f"{service_url}/tools", "run": f"{service_url}/run/"}
+            self._endpoints[name] = endpoints
+        return endpoints
+    
     def _get_timeout(self, service_name: Optional[str] = None) -> int:
         """获取服务超时时间
         
@@ -97,34 +165,51 @@ class MCPClient:
         name = service_name or self.service_name
         return get_request_timeout(name)
     
-    async def _get_session(self, service_url: str) -> aiohttp.ClientSession:
-        """获取或创建HTTP会话
+    def _get_request_timeout(self, service_name: Optional[str] = None) -> aiohttp.ClientTimeout:
+        """获取单次请求的超时设置
         
         Args:
-            service_url: 服务URL
+            service_name: 服务名称，如果为None则使用初始化时的服务名称
             
+        Returns:
+            aiohttp.ClientTimeout: 超时设置
+        """
+        return _timeout_for(self._get_timeout(service_name))
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取或创建共享的HTTP会话
+        
+        所有服务共用同一个连接池，不同服务的超时时间在每次请求时单独指定
+        
         Returns:
             aiohttp.ClientSession: HTTP会话
         """
-        if service_url not in self.sessions or self.sessions[service_url].closed:
-            headers = get_auth_headers()
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-                
-            timeout = self._get_timeout(self.service_name)
-            self.sessions[service_url] = aiohttp.ClientSession(
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=timeout)
-            )
+        session = self._session
+        if session is not None and not session.closed:
+            return session
+            
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=100,
+                    limit_per_host=32,
+                    keepalive_timeout=60,
+                    ttl_dns_cache=300
+                )
+                self._session = aiohttp.ClientSession(
+                    headers=self._headers,
+                    connector=connector,
+                    json_serialize=lambda obj: orjson.dumps(obj).decode(),
+                    timeout=_timeout_for(self._get_timeout(None))
+                )
             
-        return self.sessions[service_url]
+        return self._session
     
     async def _close_sessions(self) -> None:
-        """关闭所有HTTP会话"""
-        for url, session in self.sessions.items():
-            if not session.closed:
-                await session.close()
-        self.sessions = {}
+        """关闭HTTP会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     @log_async_function_call
     async def get_tools(self, service_name: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -139,23 +224,32 @@ class MCPClient:
         Raises:
             MCPClientException: 获取工具列表失败时抛出
         """
-        service_url = self._get_service_url(service_name)
-        endpoint = f"{service_url}/tools"
+        key = service_name or self.service_name or "_default"
+        cached = self._tools_cache.get(key)
+        if cached and time.monotonic() - cached[0] < self._tools_ttl:
+            # 缓存保存为元组，每次返回新列表，调用方修改结果不会影响缓存
+            return list(cached[1])
+            
+        endpoint = self._get_endpoints(service_name)["tools"]
         
         try:
-            session = await self._get_session(service_url)
-            async with session.get(endpoint) as response:
+            session = await self._get_session()
+            async with session.get(endpoint, timeout=self._get_request_timeout(service_name)) as response:
                 if response.status == 404:
                     logger.warning(f"服务 {service_name if service_name else '默认'} 的工具端点不存在")
                     return []
                     
                 if response.status != 200:
+                    if response.status >= 500:
+                        self.invalidate_tools(key)
                     error_text = await response.text()
                     raise MCPClientException(
-                        f"获取工具列表失败: HTTP状态码 {response.status}, 响应: {error_text}"
+                        f"获取工具列表失败: HTTP状态码 {response.status}, 响应: {error_text}",
+                        status=response.status
                     )
                 
-                result = await response.json()
+                result = orjson.loads(await response.read())
+                self._tools_cache[key] = (time.monotonic(), tuple(result))
                 logger.info(f"从服务 {service_name if service_name else '默认'} 获取到 {len(result)} 个工具")
                 return result
                 
@@ -164,22 +258,33 @@ class MCPClient:
             raise ServiceUnavailableException(f"服务 {service_name if service_name else '默认'} 不可用: {str(e)}")
         except json.JSONDecodeError as e:
             raise MCPClientException(f"解析工具列表响应失败: {str(e)}")
+        except MCPClientException:
+            raise
         except Exception as e:
             raise MCPClientException(f"获取工具列表时发生未知错误: {str(e)}")
     
+    def invalidate_tools(self, service_name: Optional[str] = None) -> None:
+        """清除工具列表缓存，下次获取时重新请求
+        
+        Args:
+            service_name: 服务名称，如果为None则清除所有服务的缓存
+        """
+        if service_name is None:
+            self._tools_cache.clear()
+        else:
+            self._tools_cache.pop(service_name, None)
+    
     @log_async_function_call
     async def call_tool(self, 
                       tool_name: str, 
                       params: Dict[str, Any],
-                      service_name: Optional[str] = None,
-                      stream: bool = False) -> Dict[str, Any]:
+                      service_name: Optional[str] = None) -> Dict[str, Any]:
         """调用工具
         
         Args:
             tool_name: 工具名称
             params: 工具参数
             service_name: 服务名称，如果为None则使用初始化时的服务名称
-            stream: 是否使用流式响应
         
         Returns:
             Dict[str, Any]: 工具执行结果
@@ -187,58 +292,27 @@ class MCPClient:
         Raises:
             MCPClientException: 调用工具失败时抛出
         """
-        service_url = self._get_service_url(service_name)
-        endpoint = f"{service_url}/run/{tool_name}"
-        
-        if stream:
-            endpoint += "?stream=true"
+        endpoint = self._get_endpoints(service_name)["run"] + tool_name
         
         try:
-            session = await self._get_session(service_url)
+            session = await self._get_session()
+            timeout = self._get_request_timeout(service_name)
             
-            if not stream:
-                # 常规调用
-                async with session.post(endpoint, json=params) as response:
-                    if response.status == 404:
-                        raise ToolNotFoundException(f"工具 '{tool_name}' 在服务 {service_name if service_name else '默认'} 中不存在")
-                        
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise MCPClientException(
-                            f"调用工具 '{tool_name}' 失败: HTTP状态码 {response.status}, 响应: {error_text}"
-                        )
-                    
-                    result = await response.json()
-                    return result
-            else:
-                # 流式调用
-                result = {"chunks": []}
-                async with session.post(endpoint, json=params) as response:
-                    if response.status == 404:
-                        raise ToolNotFoundException(f"工具 '{tool_name}' 在服务 {service_name if service_name else '默认'} 中不存在")
-                        
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise MCPClientException(
-                            f"调用工具 '{tool_name}' 流式模式失败: HTTP状态码 {response.status}, 响应: {error_text}"
-                        )
+            async with session.post(endpoint, json=params, timeout=timeout) as response:
+                if response.status == 404:
+                    raise ToolNotFoundException(
+                        f"工具 '{tool_name}' 在服务 {service_name if service_name else '默认'} 中不存在",
+                        status=404
+                    )
                     
-                    # 处理SSE（Server-Sent Events）格式
-                    async for line in response.content:
-                        line = line.decode('utf-8').strip()
-                        if line.startswith('data:'):
-                            data_str = line[5:].strip()
-                            if data_str:
-                                try:
-                                    data = json.loads(data_str)
-                                    if 'chunk' in data:
-                                        result["chunks"].append(data["chunk"])
-                                        yield data  # 生成器模式，将每个块传递给调用者
-                                except json.JSONDecodeError:
-                                    logger.warning(f"无法解析流式响应: {data_str}")
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise MCPClientException(
+                        f"调用工具 '{tool_name}' 失败: HTTP状态码 {response.status}, 响应: {error_text}",
+                        status=response.status
+                    )
                 
-                # 合并所有块
-                result["content"] = "".join(result["chunks"])
+                result = orjson.loads(await response.read())
                 return result
                 
         except aiohttp.ClientError as e:
@@ -246,11 +320,98 @@ class MCPClient:
             raise ServiceUnavailableException(f"服务 {service_name if service_name else '默认'} 不可用: {str(e)}")
         except json.JSONDecodeError as e:
             raise MCPClientException(f"解析工具 '{tool_name}' 响应失败: {str(e)}")
-        except (ToolNotFoundException, ServiceUnavailableException):
+        except MCPClientException:
+            raise
+        except Exception as e:
+            raise MCPClientException(f"调用工具 '{tool_name}' 时发生未知错误: {str(e)}")
+    
+    async def call_tool_stream(self,
+                             tool_name: str,
+                             params: Dict[str, Any],
+                             service_name: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """以流式模式调用工具
+        
+        Args:
+            tool_name: 工具名称
+            params: 工具参数
+            service_name: 服务名称，如果为None则使用初始化时的服务名称
+        
+        Yields:
+            Dict[str, Any]: 服务推送的每个数据块，包含chunk字段
+        
+        Raises:
+            MCPClientException: 调用工具失败时抛出
+        """
+        endpoint = self._get_endpoints(service_name)["run"] + tool_name + "?stream=true"
+        
+        try:
+            session = await self._get_session()
+            timeout = self._get_request_timeout(service_name)
+            
+            async with session.post(endpoint, json=params, timeout=timeout) as response:
+                if response.status == 404:
+                    raise ToolNotFoundException(
+                        f"工具 '{tool_name}' 在服务 {service_name if service_name else '默认'} 中不存在",
+                        status=404
+                    )
+                    
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise MCPClientException(
+                        f"调用工具 '{tool_name}' 流式模式失败: HTTP状态码 {response.status}, 响应: {error_text}",
+                        status=response.status
+                    )
+                
+                # 处理SSE（Server-Sent Events）格式
+                # 直接在字节上匹配前缀，只解码JSON负载
+                async for line in response.content:
+                    if line.startswith(b'data:'):
+                        data_bytes = line[5:].strip()
+                        if data_bytes:
+                            try:
+                                data = orjson.loads(data_bytes)
+                            except json.JSONDecodeError:
+                                logger.warning(f"无法解析流式响应: {data_bytes.decode('utf-8', 'replace')}")
+                                continue
+                            if 'chunk' in data:
+                                yield data
+                
+        except aiohttp.ClientError as e:
+            logger.error(f"调用工具 '{tool_name}' 时网络错误: {str(e)}")
+            raise ServiceUnavailableException(f"服务 {service_name if service_name else '默认'} 不可用: {str(e)}")
+        except MCPClientException:
             raise
         except Exception as e:
             raise MCPClientException(f"调用工具 '{tool_name}' 时发生未知错误: {str(e)}")
     
+    async def _collect_stream(self,
+                            tool_name: str,
+                            params: Dict[str, Any],
+                            service_name: Optional[str] = None,
+                            keep_chunks: bool = True) -> Dict[str, Any]:
+        """消费流式调用并合并所有数据块
+        
+        Args:
+            tool_name: 工具名称
+            params: 工具参数
+            service_name: 服务名称，如果为None则使用初始化时的服务名称
+            keep_chunks: 是否在结果中保留各个数据块，只需要合并内容时可关闭
+            
+        Returns:
+            Dict[str, Any]: 包含合并后content（以及chunks）的结果
+        """
+        result = {"chunks": []} if keep_chunks else {}
+        buf = bytearray()
+        async for data in self.call_tool_stream(tool_name, params, service_name):
+            chunk = data["chunk"]
+            buf.extend(chunk if isinstance(chunk, bytes) else str(chunk).encode("utf-8"))
+            if keep_chunks:
+                result["chunks"].append(chunk)
+            
+        # 合并所有块，只解码一次
+        result["content"] = buf.decode("utf-8")
+        return result
+    
     async def call_tool_with_retry(self,
                                 tool_name: str,
                                 params: Dict[str, Any],
@@ -264,7 +425,7 @@ class MCPClient:
             params: 工具参数
             service_name: 服务名称，如果为None则使用初始化时的服务名称
             max_retries: 最大重试次数，如果为None则使用配置中的重试次数
-            stream: 是否使用流式响应
+            stream: 是否使用流式响应，为True时合并所有数据块后返回
             
         Returns:
             Dict[str, Any]: 工具执行结果
@@ -274,19 +435,55 @@ class MCPClient:
         """
         retries = max_retries if max_retries is not None else get_max_retries()
         retry_count = 0
+        deadline = time.monotonic() + self._get_timeout(service_name) * RETRY_BUDGET_FACTOR
         
         while True:
             try:
-                return await self.call_tool(tool_name, params, service_name, stream)
+                if stream:
+                    return await self._collect_stream(tool_name, params, service_name)
+                return await self.call_tool(tool_name, params, service_name)
             except (MCPClientException, aiohttp.ClientError) as e:
                 retry_count += 1
                 if retry_count > retries or isinstance(e, ToolNotFoundException):
                     raise
+                    
+                # 客户端错误（参数、认证等）不会因重试而恢复
+                if getattr(e, "status", None) in NON_RETRYABLE_STATUS:
+                    raise
+                
+                # 带上限和随机抖动的指数退避，避免并发调用同步重试
+                base = min(get_retry_interval() * (2 ** (retry_count - 1)), MAX_RETRY_WAIT)
+                wait_time = base * (0.5 + random.random() * 0.5)
                 
-                wait_time = 2 ** retry_count  # 指数退避
-                logger.warning(f"调用工具 '{tool_name}' 失败，将在 {wait_time} 秒后进行第 {retry_count} 次重试: {str(e)}")
+                # 超出总耗时预算时不再重试
+                if time.monotonic() + wait_time > deadline:
+                    raise
+                    
+                logger.warning(f"调用工具 '{tool_name}' 失败，将在 {wait_time:.2f} 秒后进行第 {retry_count} 次重试: {str(e)}")
                 await asyncio.sleep(wait_time)
     
+    async def warmup(self, service_names: Optional[List[str]] = None) -> None:
+        """预先建立到各服务的连接
+        
+        并发向各服务发送HEAD请求，使连接池中提前保留可复用的keep-alive连接，
+        后续的搜索、大纲、写作、编辑调用无需再进行TCP/TLS握手
+        
+        Args:
+            service_names: 服务名称列表，如果为None则预热所有配置的服务
+        """
+        names = list(service_names) if service_names is not None else list(get_all_services())
+        session = await self._get_session()
+        
+        async def _ping(name: str) -> None:
+            endpoint = self._get_endpoints(name)["tools"]
+            async with session.head(endpoint, timeout=self._get_request_timeout(name)):
+                pass
+        
+        results = await asyncio.gather(*(_ping(name) for name in names), return_exceptions=True)
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.debug(f"预热服务 {name} 的连接失败: {str(result)}")
+    
     @log_async_function_call
     async def discover_tools(self) -> Dict[str, List[Dict[str, Any]]]:
         """发现所有服务中可用的工具
@@ -294,16 +491,21 @@ class MCPClient:
         Returns:
             Dict[str, List[Dict[str, Any]]]: 按服务名称分组的工具列表
         """
-        services = get_all_services()
+        names = list(get_all_services())
         results = {}
         
-        for service_name, _ in services.items():
-            try:
-                tools = await self.get_tools(service_name)
-                results[service_name] = tools
-            except Exception as e:
-                logger.error(f"获取服务 {service_name} 的工具列表失败: {str(e)}")
+        # 并发请求所有服务
+        tools_list = await asyncio.gather(
+            *(self.get_tools(name) for name in names),
+            return_exceptions=True
+        )
+        
+        for service_name, tools in zip(names, tools_list):
+            if isinstance(tools, Exception):
+                logger.error(f"获取服务 {service_name} 的工具列表失败: {str(tools)}")
                 results[service_name] = []
+            else:
+                results[service_name] = tools
                 
         return results
     
@@ -320,6 +522,25 @@ class MCPClient:
         await self.close()
 
 # 简单的服务健康检查
+async def check_services_health(service_names: List[str]) -> Dict[str, bool]:
+    """并发检查多个MCP服务的健康状态
+    
+    所有检查共用一个客户端及其连接池
+    
+    Args:
+        service_names: 服务名称列表
+        
+    Returns:
+        Dict[str, bool]: 各服务是否可用
+    """
+    names = list(service_names)
+    async with MCPClient() as client:
+        results = await asyncio.gather(
+            *(client.get_tools(name) for name in names),
+            return_exceptions=True
+        )
+    return {name: not isinstance(result, Exception) for name, result in zip(names, results)}
+
 async def check_service_health(service_name: str) -> bool:
     """检查MCP服务的健康状态
     
@@ -329,13 +550,36 @@ async def check_service_health(service_name: str) -> bool:
     Returns:
         bool: 服务是否可用
     """
-    try:
-        client = MCPClient(service_name)
-        await client.get_tools()
-        await client.close()
-        return True
-    except Exception:
-        return False
+    results = await check_services_health([service_name])
+    return results[service_name]
+
+async def get_tools(service_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """获取服务的可用工具列表，使用临时客户端
+    
+    Args:
+        service_name: 服务名称
+        
+    Returns:
+        List[Dict[str, Any]]: 可用工具列表
+    """
+    async with MCPClient() as client:
+        return await client.get_tools(service_name)
+
+async def call_tool(tool_name: str, 
+                    params: Dict[str, Any],
+                    service_name: Optional[str] = None) -> Dict[str, Any]:
+    """调用工具，使用临时客户端
+    
+    Args:
+        tool_name: 工具名称
+        params: 工具参数
+        service_name: 服务名称
+        
+    Returns:
+        Dict[str, Any]: 工具执行结果
+    """
+    async with MCPClient() as client:
+        return await client.call_tool(tool_name, params, service_name)
 
 # 测试函数
 async def test_mcp_client():
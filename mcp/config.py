@@ -6,6 +6,8 @@ MCP配置模块
 
 import os
 import sys
+import functools
+from types import MappingProxyType
 from typing import Optional, Dict, Any
 
 # 添加项目根目录到路径
@@ -17,13 +19,13 @@ logger = get_logger(__name__)
 # MCP服务URL
 MCP_SERVICE_URL = os.environ.get("MCP_SERVICE_URL", "http://localhost:8000/api/v1")
 
-# MCP专用服务URL配置
-MCP_SERVICES = {
+# MCP专用服务URL配置（只读）
+MCP_SERVICES = MappingProxyType({
     "search_service": os.environ.get("MCP_SEARCH_SERVICE", f"{MCP_SERVICE_URL}/search"),
     "outline_service": os.environ.get("MCP_OUTLINE_SERVICE", f"{MCP_SERVICE_URL}/outline"),
     "writing_service": os.environ.get("MCP_WRITING_SERVICE", f"{MCP_SERVICE_URL}/writing"),
     "editing_service": os.environ.get("MCP_EDITING_SERVICE", f"{MCP_SERVICE_URL}/editing"),
-}
+})
 
 # MCP服务API密钥
 MCP_API_KEY = os.environ.get("MCP_API_KEY", "")
@@ -31,13 +33,13 @@ MCP_API_KEY = os.environ.get("MCP_API_KEY", "")
 # MCP请求超时时间(秒)
 MCP_REQUEST_TIMEOUT = int(os.environ.get("MCP_REQUEST_TIMEOUT", "30"))
 
-# 服务特定超时时间（秒）
-MCP_TIMEOUTS = {
+# 服务特定超时时间（秒，只读）
+MCP_TIMEOUTS = MappingProxyType({
     "search_service": int(os.environ.get("MCP_SEARCH_TIMEOUT", "15")),
     "outline_service": int(os.environ.get("MCP_OUTLINE_TIMEOUT", "30")),
     "writing_service": int(os.environ.get("MCP_WRITING_TIMEOUT", "60")),
     "editing_service": int(os.environ.get("MCP_EDITING_TIMEOUT", "90")),
-}
+})
 
 # 最大重试次数
 MAX_RETRIES = int(os.environ.get("MCP_MAX_RETRIES", "3"))
@@ -53,8 +55,8 @@ HEALTH_CHECK = {
     "enabled": os.environ.get("MCP_HEALTH_CHECK", "true").lower() in ["true", "1", "yes"],
     "interval": int(os.environ.get("MCP_HEALTH_CHECK_INTERVAL", "60")),
     "timeout": float(os.environ.get("MCP_HEALTH_CHECK_TIMEOUT", "5.0")),
-    "required_services": ["search_service", "outline_service"],
-    "optional_services": ["writing_service", "editing_service"],
+    "required_services": frozenset({"search_service", "outline_service"}),
+    "optional_services": frozenset({"writing_service", "editing_service"}),
 }
 
 def get_mcp_service_url() -> str:
@@ -65,6 +67,7 @@ def get_mcp_service_url() -> str:
     """
     return MCP_SERVICE_URL
 
+@functools.lru_cache(maxsize=None)
 def get_service_url(service_name: str) -> str:
     """获取特定MCP服务的URL
     
@@ -84,6 +87,7 @@ def get_mcp_api_key() -> Optional[str]:
     """
     return MCP_API_KEY if MCP_API_KEY else None
 
+@functools.lru_cache(maxsize=None)
 def get_request_timeout(service_name: Optional[str] = None) -> int:
     """获取请求超时时间
     
@@ -105,6 +109,14 @@ def get_max_retries() -> int:
     """
     return MAX_RETRIES
 
+def get_retry_interval() -> float:
+    """获取重试基础间隔时间
+    
+    Returns:
+        float: 间隔时间(秒)
+    """
+    return RETRY_INTERVAL
+
 def get_auth_headers() -> Dict[str, str]:
     """获取认证头信息
     
@@ -116,6 +128,7 @@ def get_auth_headers() -> Dict[str, str]:
         headers["X-API-Key"] = MCP_API_KEY
     return headers
 
+@functools.lru_cache(maxsize=None)
 def is_service_required(service_name: str) -> bool:
     """检查服务是否为必需服务
     
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+多代理协作故事生成器项目 - MCP工具列表磁盘缓存
+按服务地址和模式版本缓存工具发现结果，跨进程复用
+"""
+
+import os
+import sys
+import time
+import threading
+from typing import Dict, List, Any, Optional
+
+import orjson
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 缓存配置
+MCP_TOOLS_CACHE_DIR = os.environ.get("MCP_TOOLS_CACHE_DIR", os.path.expanduser("~/.cache/a2a_mcp_tools"))
+MCP_TOOLS_CACHE_TTL = float(os.environ.get("MCP_TOOLS_CACHE_TTL", "86400"))  # 秒
+
+# 工具描述格式的版本，格式变化时递增，使旧缓存自动失效
+SCHEMA_VERSION = 1
+
+_CACHE_FILE = os.path.join(MCP_TOOLS_CACHE_DIR, "tools.json")
+_lock = threading.Lock()
+
+def _cache_key(service_url: str) -> str:
+    """生成缓存键"""
+    return f"{service_url}|{SCHEMA_VERSION}"
+
+def _read() -> Dict[str, Any]:
+    """读取整个缓存文件，文件不存在或损坏时返回空字典"""
+    try:
+        with open(_CACHE_FILE, "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return {}
+    except (OSError, orjson.JSONDecodeError) as e:
+        logger.warning(f"读取工具缓存失败: {str(e)}")
+        return {}
+
+def _write(entries: Dict[str, Any]) -> None:
+    """原子地写回缓存文件"""
+    try:
+        os.makedirs(MCP_TOOLS_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(entries))
+        os.replace(tmp_path, _CACHE_FILE)
+    except OSError as e:
+        logger.warning(f"写入工具缓存失败: {str(e)}")
+
+def load_tools(service_url: str) -> Optional[List[Dict[str, Any]]]:
+    """读取缓存的工具列表
+
+    Args:
+        service_url: 服务地址
+
+    Returns:
+        工具列表，未命中或已过期时返回None
+    """
+    with _lock:
+        entry = _read().get(_cache_key(service_url))
+    if entry is None or time.time() - entry.get("created", 0) > MCP_TOOLS_CACHE_TTL:
+        return None
+    return entry.get("tools")
+
+def save_tools(service_url: str, tools: List[Dict[str, Any]]) -> None:
+    """保存工具列表
+
+    Args:
+        service_url: 服务地址
+        tools: 工具列表
+    """
+    with _lock:
+        entries = _read()
+        entries[_cache_key(service_url)] = {"tools": tools, "created": time.time()}
+        _write(entries)
+
+def invalidate_tools(service_url: str) -> None:
+    """删除某个服务的缓存，例如调用时发现工具不存在
+
+    Args:
+        service_url: 服务地址
+    """
+    with _lock:
+        entries = _read()
+        if entries.pop(_cache_key(service_url), None) is not None:
+            _write(entries)
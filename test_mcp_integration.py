@@ -7,15 +7,17 @@ MCP服务集成测试脚本
 import os
 import sys
 import json
+import time
 import asyncio
 import argparse
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from mcp.client import MCPClient, check_service_health
-from mcp.config import get_all_services, initialize as init_config
+from mcp import tools_cache
+from mcp.client import MCPClient, ToolNotFoundException, check_services_health
+from mcp.config import get_all_services, get_service_url, initialize as init_config
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -32,30 +34,59 @@ class ColorPrinter:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
     
+    @staticmethod
+    def format_header(msg: str) -> str:
+        """格式化带颜色的标题"""
+        return f"\n{ColorPrinter.HEADER}{ColorPrinter.BOLD}{msg}{ColorPrinter.ENDC}"
+    
+    @staticmethod
+    def format_success(msg: str) -> str:
+        """格式化成功信息"""
+        return f"{ColorPrinter.GREEN}✓ {msg}{ColorPrinter.ENDC}"
+    
+    @staticmethod
+    def format_error(msg: str) -> str:
+        """格式化错误信息"""
+        return f"{ColorPrinter.RED}✗ {msg}{ColorPrinter.ENDC}"
+    
+    @staticmethod
+    def format_warning(msg: str) -> str:
+        """格式化警告信息"""
+        return f"{ColorPrinter.YELLOW}! {msg}{ColorPrinter.ENDC}"
+    
+    @staticmethod
+    def format_info(msg: str) -> str:
+        """格式化普通信息"""
+        return f"{ColorPrinter.BLUE}> {msg}{ColorPrinter.ENDC}"
+    
     @staticmethod
     def print_header(msg: str) -> None:
         """打印带颜色的标题"""
-        print(f"\n{ColorPrinter.HEADER}{ColorPrinter.BOLD}{msg}{ColorPrinter.ENDC}")
+        print(ColorPrinter.format_header(msg))
     
     @staticmethod
     def print_success(msg: str) -> None:
         """打印成功信息"""
-        print(f"{ColorPrinter.GREEN}✓ {msg}{ColorPrinter.ENDC}")
+        print(ColorPrinter.format_success(msg))
     
     @staticmethod
     def print_error(msg: str) -> None:
         """打印错误信息"""
-        print(f"{ColorPrinter.RED}✗ {msg}{ColorPrinter.ENDC}")
+        print(ColorPrinter.format_error(msg))
     
     @staticmethod
     def print_warning(msg: str) -> None:
         """打印警告信息"""
-        print(f"{ColorPrinter.YELLOW}! {msg}{ColorPrinter.ENDC}")
+        print(ColorPrinter.format_warning(msg))
     
     @staticmethod
     def print_info(msg: str) -> None:
         """打印普通信息"""
-        print(f"{ColorPrinter.BLUE}> {msg}{ColorPrinter.ENDC}")
+        print(ColorPrinter.format_info(msg))
+
+def _write_lines(lines: List[str]) -> None:
+    """一次写出多行输出"""
+    sys.stdout.write("\n".join(lines) + "\n")
 
 async def test_service_health() -> Dict[str, bool]:
     """测试所有MCP服务的健康状态
@@ -63,145 +94,254 @@ async def test_service_health() -> Dict[str, bool]:
     Returns:
         Dict[str, bool]: 各服务的健康状态
     """
-    ColorPrinter.print_header("测试MCP服务健康状态")
-    
     services = get_all_services()
     if not services:
+        ColorPrinter.print_header("测试MCP服务健康状态")
         ColorPrinter.print_warning("未配置任何MCP服务")
         return {}
     
-    results = {}
+    # 各服务的检查互不依赖，并发执行
+    results = await check_services_health(list(services))
+    
+    # 按配置顺序汇总输出，一次写出
+    lines = [ColorPrinter.format_header("测试MCP服务健康状态")]
     for service_name, url in services.items():
-        ColorPrinter.print_info(f"正在检查服务 '{service_name}' ({url})...")
-        is_healthy = await check_service_health(service_name)
-        results[service_name] = is_healthy
-        
-        if is_healthy:
-            ColorPrinter.print_success(f"服务 '{service_name}' 运行正常")
+        lines.append(ColorPrinter.format_info(f"正在检查服务 '{service_name}' ({url})..."))
+        if results[service_name]:
+            lines.append(ColorPrinter.format_success(f"服务 '{service_name}' 运行正常"))
         else:
-            ColorPrinter.print_error(f"服务 '{service_name}' 不可用")
+            lines.append(ColorPrinter.format_error(f"服务 '{service_name}' 不可用"))
+    _write_lines(lines)
     
     return results
 
-async def discover_tools() -> Dict[str, List[Dict[str, Any]]]:
+# 后台刷新工具缓存的任务，在客户端关闭前等待完成
+_refresh_tasks: List[asyncio.Task] = []
+
+def _load_cached_tools() -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """从磁盘缓存读取所有服务的工具列表
+    
+    Returns:
+        各服务及其工具列表，任一服务未命中时返回None
+    """
+    cached = {}
+    for service_name, url in get_all_services().items():
+        tools = tools_cache.load_tools(url)
+        if tools is None:
+            return None
+        cached[service_name] = tools
+    return cached
+
+async def _refresh_tools_cache(client: MCPClient) -> Dict[str, List[Dict[str, Any]]]:
+    """重新发现工具并写入磁盘缓存
+    
+    Args:
+        client: MCP客户端
+        
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: 各服务及其工具列表
+    """
+    tools_by_service = await client.discover_tools()
+    services = get_all_services()
+    for service_name, tools in tools_by_service.items():
+        # 获取失败时返回空列表，不写入缓存
+        if tools:
+            tools_cache.save_tools(services[service_name], tools)
+    return tools_by_service
+
+async def _wait_refresh() -> None:
+    """等待后台的缓存刷新任务结束"""
+    if _refresh_tasks:
+        await asyncio.gather(*_refresh_tasks, return_exceptions=True)
+        _refresh_tasks.clear()
+
+async def discover_tools(client: Optional[MCPClient] = None) -> Dict[str, List[Dict[str, Any]]]:
     """发现所有服务的工具
     
+    Args:
+        client: 共享的MCP客户端，为None时创建临时客户端
+        
     Returns:
         Dict[str, List[Dict[str, Any]]]: 各服务及其工具列表
     """
+    if client is None:
+        async with MCPClient() as client:
+            result = await discover_tools(client)
+            await _wait_refresh()
+            return result
+    
     ColorPrinter.print_header("发现MCP工具")
     
-    async with MCPClient() as client:
-        tools_by_service = await client.discover_tools()
-        
-        for service_name, tools in tools_by_service.items():
-            if tools:
-                ColorPrinter.print_success(f"服务 '{service_name}' 提供 {len(tools)} 个工具:")
-                for i, tool in enumerate(tools, 1):
-                    print(f"  {i}. {tool.get('name')}: {tool.get('description', '无描述')}")
-            else:
-                ColorPrinter.print_warning(f"服务 '{service_name}' 未提供任何工具")
-        
-        if not tools_by_service:
-            ColorPrinter.print_error("未发现任何MCP工具")
+    # 优先使用磁盘缓存，同时在后台刷新，供下次运行使用
+    tools_by_service = _load_cached_tools()
+    if tools_by_service is None:
+        tools_by_service = await _refresh_tools_cache(client)
+    else:
+        ColorPrinter.print_info("使用缓存的工具列表")
+        _refresh_tasks.append(asyncio.create_task(_refresh_tools_cache(client)))
+    
+    for service_name, tools in tools_by_service.items():
+        if tools:
+            ColorPrinter.print_success(f"服务 '{service_name}' 提供 {len(tools)} 个工具:")
+            for i, tool in enumerate(tools, 1):
+                print(f"  {i}. {tool.get('name')}: {tool.get('description', '无描述')}")
+        else:
+            ColorPrinter.print_warning(f"服务 '{service_name}' 未提供任何工具")
+    
+    if not tools_by_service:
+        ColorPrinter.print_error("未发现任何MCP工具")
             
     return tools_by_service
 
-async def test_search_tool() -> bool:
-    """测试搜索工具
+def _invalidate_on_missing_tool(error: Exception, service_name: str) -> None:
+    """工具不存在时清除该服务的工具缓存，说明缓存已过时
     
+    Args:
+        error: 调用工具时的异常
+        service_name: 服务名称
+    """
+    if isinstance(error, ToolNotFoundException):
+        tools_cache.invalidate_tools(get_service_url(service_name))
+
+async def _search_tool_lines(client: MCPClient) -> Tuple[bool, List[str]]:
+    """运行搜索工具测试并收集输出
+    
+    Args:
+        client: MCP客户端
+        
     Returns:
-        bool: 测试是否成功
+        Tuple[bool, List[str]]: 测试是否成功，以及待输出的行
     """
-    ColorPrinter.print_header("测试搜索工具")
+    lines = [ColorPrinter.format_header("测试搜索工具")]
     
     service_name = "search_service"
     tool_name = "search_relevant_information"
     test_query = "多代理协作系统"
     
     try:
-        async with MCPClient(service_name) as client:
-            ColorPrinter.print_info(f"正在搜索: '{test_query}'...")
+        lines.append(ColorPrinter.format_info(f"正在搜索: '{test_query}'..."))
+        
+        result = await client.call_tool_with_retry(
+            tool_name,
+            {"topic": test_query, "depth": 2},
+            service_name
+        )
+        
+        if "results" in result:
+            result_count = len(result["results"])
+            lines.append(ColorPrinter.format_success(f"搜索成功，获取到 {result_count} 条结果"))
             
-            result = await client.call_tool_with_retry(
-                tool_name,
-                {"topic": test_query, "depth": 2},
-                service_name
-            )
+            if result_count > 0:
+                lines.append("\n搜索结果示例:")
+                for i, item in enumerate(result["results"][:3], 1):
+                    lines.append(f"  {i}. {item.get('title', '无标题')}")
+                    lines.append(f"     {item.get('snippet', '无摘要')[:100]}...")
+            
+            return True, lines
+        else:
+            lines.append(ColorPrinter.format_error("搜索结果格式不正确"))
+            return False, lines
             
-            if "results" in result:
-                result_count = len(result["results"])
-                ColorPrinter.print_success(f"搜索成功，获取到 {result_count} 条结果")
-                
-                if result_count > 0:
-                    print("\n搜索结果示例:")
-                    for i, item in enumerate(result["results"][:3], 1):
-                        print(f"  {i}. {item.get('title', '无标题')}")
-                        print(f"     {item.get('snippet', '无摘要')[:100]}...")
-                
-                return True
-            else:
-                ColorPrinter.print_error("搜索结果格式不正确")
-                return False
-                
     except Exception as e:
-        ColorPrinter.print_error(f"搜索测试失败: {str(e)}")
-        return False
+        _invalidate_on_missing_tool(e, service_name)
+        lines.append(ColorPrinter.format_error(f"搜索测试失败: {str(e)}"))
+        return False, lines
 
-async def test_outline_tool() -> bool:
-    """测试大纲工具
+async def test_search_tool(client: Optional[MCPClient] = None) -> bool:
+    """测试搜索工具
     
+    Args:
+        client: 共享的MCP客户端，为None时创建临时客户端
+        
     Returns:
         bool: 测试是否成功
     """
-    ColorPrinter.print_header("测试大纲工具")
+    if client is None:
+        async with MCPClient() as client:
+            return await test_search_tool(client)
+    
+    ok, lines = await _search_tool_lines(client)
+    _write_lines(lines)
+    return ok
+
+async def _outline_tool_lines(client: MCPClient) -> Tuple[bool, List[str]]:
+    """运行大纲工具测试并收集输出
+    
+    Args:
+        client: MCP客户端
+        
+    Returns:
+        Tuple[bool, List[str]]: 测试是否成功，以及待输出的行
+    """
+    lines = [ColorPrinter.format_header("测试大纲工具")]
     
     service_name = "outline_service"
     tool_name = "generate_structured_outline"
     test_topic = "未来智能城市"
     
     try:
-        async with MCPClient(service_name) as client:
-            ColorPrinter.print_info(f"正在生成主题为 '{test_topic}' 的故事大纲...")
+        lines.append(ColorPrinter.format_info(f"正在生成主题为 '{test_topic}' 的故事大纲..."))
+        
+        result = await client.call_tool_with_retry(
+            tool_name,
+            {
+                "topic": test_topic,
+                "research": [
+                    {"title": "智能城市概念", "content": "智能城市是运用信息和通信技术手段感测、分析、整合城市运行核心系统的各项关键信息，从而对包括民生、环保、公共安全、城市服务、工商业活动在内的各种需求做出智能响应。"},
+                    {"title": "未来交通系统", "content": "未来交通系统将实现全自动驾驶，采用共享模式和清洁能源，大幅减少交通拥堵和环境污染。"}
+                ],
+                "structure": "四部分"
+            },
+            service_name
+        )
+        
+        if "sections" in result:
+            section_count = len(result["sections"])
+            lines.append(ColorPrinter.format_success(f"大纲生成成功，包含 {section_count} 个部分"))
             
-            result = await client.call_tool_with_retry(
-                tool_name,
-                {
-                    "topic": test_topic,
-                    "research": [
-                        {"title": "智能城市概念", "content": "智能城市是运用信息和通信技术手段感测、分析、整合城市运行核心系统的各项关键信息，从而对包括民生、环保、公共安全、城市服务、工商业活动在内的各种需求做出智能响应。"},
-                        {"title": "未来交通系统", "content": "未来交通系统将实现全自动驾驶，采用共享模式和清洁能源，大幅减少交通拥堵和环境污染。"}
-                    ],
-                    "structure": "四部分"
-                },
-                service_name
-            )
+            lines.append(f"\n故事标题: {result.get('title', '无标题')}")
+            for section_name, section_data in result.get("sections", {}).items():
+                lines.append(f"  • {section_name}: {section_data.get('title', '无小标题')}")
+            
+            return True, lines
+        else:
+            lines.append(ColorPrinter.format_error("大纲结果格式不正确"))
+            return False, lines
             
-            if "sections" in result:
-                section_count = len(result["sections"])
-                ColorPrinter.print_success(f"大纲生成成功，包含 {section_count} 个部分")
-                
-                print(f"\n故事标题: {result.get('title', '无标题')}")
-                for section_name, section_data in result.get("sections", {}).items():
-                    print(f"  • {section_name}: {section_data.get('title', '无小标题')}")
-                
-                return True
-            else:
-                ColorPrinter.print_error("大纲结果格式不正确")
-                return False
-                
     except Exception as e:
-        ColorPrinter.print_error(f"大纲测试失败: {str(e)}")
-        return False
+        _invalidate_on_missing_tool(e, service_name)
+        lines.append(ColorPrinter.format_error(f"大纲测试失败: {str(e)}"))
+        return False, lines
+
+async def test_outline_tool(client: Optional[MCPClient] = None) -> bool:
+    """测试大纲工具
+    
+    Args:
+        client: 共享的MCP客户端，为None时创建临时客户端
+        
+    Returns:
+        bool: 测试是否成功
+    """
+    if client is None:
+        async with MCPClient() as client:
+            return await test_outline_tool(client)
+    
+    ok, lines = await _outline_tool_lines(client)
+    _write_lines(lines)
+    return ok
 
-async def run_integration_test(args):
+async def run_integration_test(args, client: Optional[MCPClient] = None):
     """运行集成测试
     
     Args:
         args: 命令行参数
+        client: 共享的MCP客户端，为None时初始化配置并创建新客户端
     """
-    # 初始化配置
-    init_config()
+    if client is None:
+        # 初始化配置
+        init_config()
+        async with MCPClient() as client:
+            return await run_integration_test(args, client)
     
     # 测试服务健康状态
     health_results = await test_service_health()
@@ -213,14 +353,25 @@ async def run_integration_test(args):
     
     # 发现工具
     if not args.skip_discovery:
-        tools_map = await discover_tools()
+        tools_map = await discover_tools(client)
     
-    # 根据参数决定测试哪些工具
+    # 根据参数决定测试哪些工具，不同服务的测试并发执行
+    tool_tests = []
     if args.test_search or args.test_all:
-        await test_search_tool()
+        tool_tests.append(_search_tool_lines(client))
     
     if args.test_outline or args.test_all:
-        await test_outline_tool()
+        tool_tests.append(_outline_tool_lines(client))
+    
+    if tool_tests:
+        # 全部完成后按固定顺序输出，避免并发测试的输出交错
+        for outcome in await asyncio.gather(*tool_tests, return_exceptions=True):
+            if isinstance(outcome, BaseException):
+                ColorPrinter.print_error(f"工具测试出错: {str(outcome)}")
+            else:
+                _write_lines(outcome[1])
+    
+    await _wait_refresh()
     
     # 测试总结
     ColorPrinter.print_header("集成测试完成")
@@ -239,6 +390,31 @@ def parse_args():
     
     return parser.parse_args()
 
+def _prewarm() -> None:
+    """在计时之前完成一次性的初始化：配置和日志"""
+    init_config()
+    get_logger("_warmup")
+
+async def _main(args) -> None:
+    """预热服务连接和LLM客户端后运行集成测试，只对测试阶段计时
+    
+    Args:
+        args: 命令行参数
+    """
+    # LLM客户端按事件循环缓存，在运行测试的循环中创建，测试阶段直接复用
+    from utils.llm import get_default_client
+    get_default_client()
+    
+    async with MCPClient() as client:
+        await client.warmup()
+        
+        start = time.perf_counter()
+        await run_integration_test(args, client)
+        elapsed = time.perf_counter() - start
+    
+    ColorPrinter.print_info(f"测试阶段耗时: {elapsed:.2f} 秒")
+
 if __name__ == "__main__":
     args = parse_args()
-    asyncio.run(run_integration_test(args)) 
\ No newline at end of file
+    _prewarm()
+    asyncio.run(_main(args)) 
\ No newline at end of file
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+测试公共配置
+在导入项目模块之前设置环境变量，避免测试写入仓库或用户目录，也不会访问真实的OpenAI服务
+"""
+
+import os
+import socket
+import tempfile
+
+def _free_port() -> int:
+    """获取一个空闲的本地端口"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+STUB_LLM_PORT = _free_port()
+
+os.environ["LOG_FILE"] = ""
+os.environ["LLM_CACHE_DIR"] = tempfile.mkdtemp(prefix="a2a_llm_cache_")
+os.environ["MCP_TOOLS_CACHE_DIR"] = tempfile.mkdtemp(prefix="a2a_mcp_tools_")
+# OpenAI客户端从环境变量读取服务地址，测试中指向本地的模拟服务
+os.environ["OPENAI_API_KEY"] = "test-key"
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{STUB_LLM_PORT}/v1"
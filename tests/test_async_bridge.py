@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+同步/异步桥接测试
+"""
+
+import os
+import sys
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.async_bridge import run_sync
+
+def test_run_sync_rejects_bridge_loop():
+    async def inner():
+        return 1
+
+    async def outer():
+        try:
+            run_sync(inner())
+        except RuntimeError:
+            return "raised"
+        return "blocked"
+
+    assert run_sync(outer(), timeout=5) == "raised"
+    assert run_sync(inner(), timeout=5) == 1
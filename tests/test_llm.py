@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+LLM工具测试
+通过本地的OpenAI兼容模拟服务测试公开接口
+"""
+
+import os
+import sys
+import asyncio
+import threading
+import subprocess
+
+import pytest
+from aiohttp import web
+
+# 添加项目根目录到路径
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(_ROOT)
+
+from conftest import STUB_LLM_PORT
+from utils import llm
+
+class _StubLLMServer:
+    """在后台线程中运行的OpenAI兼容模拟服务，记录收到的请求数"""
+
+    def __init__(self, port):
+        self.port = port
+        self.requests = 0
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    async def _completions(self, request):
+        self.requests += 1
+        body = await request.json()
+        return web.json_response({
+            "id": f"stub-{self.requests}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"stub reply {self.requests}"},
+                "finish_reason": "stop"
+            }]
+        })
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._completions)
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        self._loop.run_until_complete(web.TCPSite(self._runner, "127.0.0.1", self.port).start())
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait(5)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+@pytest.fixture(scope="module")
+def stub_server():
+    server = _StubLLMServer(STUB_LLM_PORT)
+    server.start()
+    yield server
+    server.stop()
+
+def test_generate_text_works_across_sequential_runs(stub_server):
+    # 每次asyncio.run都是新的事件循环，客户端不能沿用上一个循环的连接池
+    first = asyncio.run(llm.generate_text("hello", temperature=0.5))
+    second = asyncio.run(llm.generate_text("hello", temperature=0.5))
+    assert first.startswith("stub reply")
+    assert second.startswith("stub reply")
+
+def test_generate_text_sync_uses_bridge_loop(stub_server):
+    assert llm.generate_text_sync("hello", temperature=0.5).startswith("stub reply")
+
+def test_use_cache_serves_repeated_prompt_from_disk(stub_server):
+    prompt = "cache me"
+    first = asyncio.run(llm.generate_text(prompt, temperature=0.7, use_cache=True))
+    before = stub_server.requests
+    second = asyncio.run(llm.generate_text(prompt, temperature=0.7, use_cache=True))
+    assert second == first
+    assert stub_server.requests == before
+
+def test_cache_disabled_by_default_for_nonzero_temperature(stub_server):
+    prompt = "do not cache me"
+    asyncio.run(llm.generate_text(prompt, temperature=0.7))
+    before = stub_server.requests
+    asyncio.run(llm.generate_text(prompt, temperature=0.7))
+    assert stub_server.requests == before + 1
+
+def test_import_does_not_load_openai():
+    env = dict(os.environ, OPENAI_API_KEY="test")
+    out = subprocess.run(
+        [sys.executable, "-c", "import sys, utils.llm; print('openai' in sys.modules)"],
+        cwd=_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == "False"
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+故事生成节点测试
+"""
+
+import os
+import sys
+import asyncio
+import copy
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flow.nodes import BaseStoryNode, ToolDiscoveryNode
+from utils.progress import ProgressTracker
+
+_DISCOVERED = {"search": {"healthy": True, "tools": [{"name": "search"}]}}
+
+async def _post_and_drain(node, shared):
+    await node.post_async(shared, None, _DISCOVERED)
+    await node.drain_progress()
+
+class _ReportingNode(BaseStoryNode):
+    """在执行阶段让出事件循环，并在后处理阶段报告进度的节点"""
+
+    async def exec_async(self, prep_res):
+        await asyncio.sleep(0.01)
+
+    async def post_async(self, shared, prep_res, exec_res):
+        self._bg(self.update_progress(shared, 0.5, "done"))
+        return "default"
+
+def test_post_async_reports_progress_to_tracker():
+    tracker = ProgressTracker()
+    tracker.create_task("nodes").update(status="running")
+    shared = {"task_id": "nodes", "progress_tracker": tracker}
+
+    asyncio.run(_post_and_drain(ToolDiscoveryNode(), shared))
+
+    current = tracker.get_task("nodes").get_progress()
+    assert current["progress"] == 10
+    assert current["message"] == "发现了1种可用服务"
+    assert current["status"] == "running"
+
+def test_post_async_reports_progress_to_task():
+    task = ProgressTracker().create_task("nodes")
+    shared = {"task_id": "nodes", "progress_tracker": task}
+
+    asyncio.run(_post_and_drain(ToolDiscoveryNode(), shared))
+
+    assert task.get_progress()["progress"] == 10
+
+def test_concurrent_runs_of_one_node_each_finish_their_updates():
+    tracker = ProgressTracker()
+    node = _ReportingNode()
+    task_ids = [f"run-{i}" for i in range(4)]
+    for task_id in task_ids:
+        tracker.create_task(task_id).update(status="running")
+
+    async def run_all():
+        # 与AsyncFlow一样，每次运行使用节点的浅拷贝
+        await asyncio.gather(*(
+            copy.copy(node).run_async({"task_id": task_id, "progress_tracker": tracker})
+            for task_id in task_ids
+        ))
+
+    asyncio.run(run_all())
+
+    for task_id in task_ids:
+        assert tracker.get_task(task_id).get_progress()["progress"] == 50
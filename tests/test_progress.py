@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+进度跟踪测试
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import progress
+from utils.progress import ProgressTracker
+
+def test_flush_delivers_queued_notifications():
+    tracker = ProgressTracker()
+    task = tracker.create_task("flush")
+    received = []
+    threads = set()
+
+    def callback(data):
+        received.append(data)
+        threads.add(threading.current_thread().name)
+
+    task.subscribe(callback)
+    task.update(progress=40, message="halfway")
+    task.update(status="completed", message="done")
+
+    assert progress.flush(timeout=5)
+    assert received[-1]["status"] == "completed"
+    assert "progress-notify" in threads
+
+def _coalescer():
+    tracker = ProgressTracker()
+    return tracker, progress.ProgressCoalescer(tracker, flush_interval=10)
+
+def test_coalescer_reschedules_after_loop_closed():
+    tracker, coalescer = _coalescer()
+    task = tracker.create_task("loop")
+    task.update(status="running")
+
+    async def submit(value):
+        coalescer.submit("loop", value, "step")
+
+    # 第一次写入立即生效，第二次在定时器上等待，随后循环关闭
+    asyncio.run(submit(10))
+    asyncio.run(submit(20))
+    assert task.get_progress()["progress"] == 10
+
+    # 新循环中的提交不应挂在已关闭循环的定时器上
+    asyncio.run(submit(30))
+    coalescer.close()
+    assert task.get_progress()["progress"] == 30
+
+    # 关闭后不应残留待写入的进度覆盖之后的写入
+    tracker.update_progress("loop", progress=50)
+    coalescer.close()
+    assert task.get_progress()["progress"] == 50
+
+def test_coalescer_forgets_removed_and_finished_tasks():
+    tracker, coalescer = _coalescer()
+    for task_id in ("removed", "finished"):
+        tracker.create_task(task_id).update(status="running")
+
+    async def submit():
+        for task_id in ("removed", "finished"):
+            coalescer.submit(task_id, 10, "step")
+            coalescer.submit(task_id, 20, "step")
+
+    asyncio.run(submit())
+    finished = tracker.get_task("finished")
+    received = []
+    finished.subscribe(received.append)
+    tracker.remove_task("removed")
+    tracker.update_progress("finished", progress=100, status="completed")
+
+    # 延迟的进度不应在任务结束后写回
+    coalescer.close()
+    assert progress.flush(timeout=5)
+    assert finished.get_progress()["status"] == "completed"
+    assert finished.get_progress()["progress"] == 100
+    assert received[-1]["status"] == "completed"
+
+    # 同名重建的任务不受旧写入记录的限流影响
+    recreated = tracker.create_task("removed")
+    recreated.update(status="running")
+
+    async def resubmit():
+        coalescer.submit("removed", 5, "again")
+        return recreated.get_progress()["progress"]
+
+    assert asyncio.run(resubmit()) == 5
+    coalescer.close()
+
+def test_progress_view_is_dict_compatible():
+    tracker = ProgressTracker()
+    task = tracker.create_task("view")
+    task.update(progress=25, status="running", message="working")
+    view = task.get_progress_view()
+
+    assert "progress" in view
+    assert "missing" not in view
+    assert list(view) == list(view.KEYS)
+    assert list(view.keys()) == list(view.KEYS)
+    assert len(view) == len(view.KEYS)
+    assert dict(view) == view.as_dict()
+    assert view == view.as_dict()
+    assert view["message"] == "working"
+    assert view.get("missing", 1) == 1
+
+def test_coalescer_applies_status_changes_immediately():
+    tracker, coalescer = _coalescer()
+    task = tracker.create_task("status")
+
+    async def transitions():
+        coalescer.submit("status", 0, "start", "running")
+        coalescer.submit("status", 10, "working")
+        coalescer.submit("status", 10, "waiting", "paused")
+        return task.get_progress()["status"]
+
+    assert asyncio.run(transitions()) == "paused"
+    coalescer.close()
+    assert task.get_progress()["status"] == "paused"
+
+def test_direct_write_supersedes_deferred_progress():
+    tracker, coalescer = _coalescer()
+    task = tracker.create_task("direct")
+    task.update(status="running")
+
+    async def race():
+        coalescer.submit("direct", 10, "first")
+        coalescer.submit("direct", 20, "deferred")
+        tracker.update_progress("direct", progress=50, message="direct")
+
+    asyncio.run(race())
+    coalescer.close()
+
+    current = task.get_progress()
+    assert current["progress"] == 50
+    assert current["message"] == "direct"
+
+def test_get_progress_returns_plain_dict():
+    task = ProgressTracker().create_task("dict")
+    task.update(progress=25, status="running", message="working")
+
+    current = task.get_progress()
+    current["extra"] = True
+    assert json.loads(json.dumps(current))["progress"] == 25
+
+def test_suppressed_update_still_refreshes_last_update_time():
+    task = ProgressTracker().create_task("stale")
+    task.min_interval_s = 60
+    task.update(progress=10, status="running", message="start")
+    before = task.get_progress()["last_update_time"]
+
+    time.sleep(0.01)
+    # 进度变化小于阈值且在限流间隔内，不通知订阅者，但时间仍需刷新
+    task.update(progress=10.1)
+
+    current = task.get_progress()
+    assert current["progress"] == 10.1
+    assert current["last_update_time"] > before
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+多代理协作故事生成器项目 - 同步/异步桥接
+在后台线程中运行一个常驻事件循环，供同步代码提交协程
+"""
+
+import asyncio
+import threading
+import concurrent.futures
+from typing import Any, Coroutine, Optional
+
+# 常驻事件循环，连接池等绑定到循环的资源可以跨调用复用
+_loop = asyncio.new_event_loop()
+_thread = threading.Thread(target=_loop.run_forever, name="async-bridge", daemon=True)
+_thread.start()
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """获取后台事件循环"""
+    return _loop
+
+def run_sync(coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+    """在后台事件循环中运行协程并等待结果
+
+    Args:
+        coro: 要运行的协程
+        timeout: 等待超时时间(秒)，None表示一直等待
+
+    Returns:
+        协程的返回值
+
+    Raises:
+        RuntimeError: 在后台事件循环内部调用时抛出，否则会阻塞循环自身导致死锁
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is _loop:
+        coro.close()
+        raise RuntimeError("run_sync不能在后台事件循环内部调用，请直接await协程")
+
+    fut = asyncio.run_coroutine_threadsafe(coro, _loop)
+    try:
+        return fut.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        fut.cancel()
+        raise
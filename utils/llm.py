@@ -4,10 +4,13 @@
 提供与LLM交互的功能
 """
 
+import io
 import os
+import re
 import sys
 import json
 import asyncio
+import weakref
 from typing import List, Dict, Any, Optional, Union, AsyncGenerator, Callable
 
 # 添加项目根目录到路径
@@ -15,17 +18,39 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # 导入日志
 from utils.logging import get_logger
+from utils.llm_cache import default_cache, make_cache_key
+from utils.async_bridge import run_sync
 logger = get_logger(__name__)
 
 try:
-    from openai import AsyncOpenAI
-    OPENAI_AVAILABLE = True
+    import orjson
+    
+    def _dumps(obj: Any) -> str:
+        """序列化为JSON字符串"""
+        return orjson.dumps(obj).decode()
 except ImportError:
-    logger.warning("OpenAI库未安装，使用模拟LLM")
-    OPENAI_AVAILABLE = False
+    def _dumps(obj: Any) -> str:
+        """序列化为JSON字符串"""
+        return json.dumps(obj, ensure_ascii=False)
+
+# OpenAI客户端类，首次创建客户端时才导入
+_async_openai = None
 
-import aiohttp
-import requests
+def _load_openai():
+    """按需导入OpenAI异步客户端类
+    
+    Returns:
+        AsyncOpenAI类，未安装OpenAI库时返回None
+    """
+    global _async_openai
+    if _async_openai is None:
+        try:
+            from openai import AsyncOpenAI
+            _async_openai = AsyncOpenAI
+        except ImportError:
+            logger.warning("OpenAI库未安装，使用模拟LLM")
+            _async_openai = False
+    return _async_openai or None
 
 # LLM API配置
 DEFAULT_LLM_MODEL = os.environ.get("LLM_MODEL", "gpt-4o")
@@ -34,6 +59,10 @@ LLM_TEMPERATURE = float(os.environ.get("LLM_TEMPERATURE", "0.7"))
 LLM_MAX_TOKENS = int(os.environ.get("LLM_MAX_TOKENS", "2000"))
 LLM_API_TIMEOUT = 60
 
+# 模拟流式响应的分块大小和每块间隔(秒)，默认不等待
+_MOCK_CHUNK = int(os.environ.get("LLM_MOCK_CHUNK", "256"))
+_MOCK_STREAM_DELAY = float(os.environ.get("LLM_MOCK_STREAM_DELAY", "0"))
+
 # 模拟响应，用于测试或OpenAI不可用时
 MOCK_RESPONSES = {
     "search": "模拟搜索结果: 找到关于此主题的10篇文章",
@@ -50,6 +79,28 @@ MOCK_RESPONSES = {
     "edit": "模拟编辑内容: 这是修改后的更流畅的故事内容..."
 }
 
+# 预先序列化的模拟响应，大纲以JSON字符串返回，与真实LLM输出一致
+_MOCK_OUTLINE_JSON = _dumps(MOCK_RESPONSES["outline"])
+_MOCK_TEXT = {**MOCK_RESPONSES, "outline": _MOCK_OUTLINE_JSON}
+
+# 模拟响应的关键词匹配，只扫描提示开头部分
+_MOCK_SCAN_LIMIT = 512
+_MOCK_RE = re.compile(r"搜索|search|大纲|outline|编辑|edit", re.IGNORECASE)
+_MOCK_DISPATCH = {
+    "搜索": "search", "search": "search",
+    "大纲": "outline", "outline": "outline",
+    "编辑": "edit", "edit": "edit"
+}
+# 同时命中多个关键词时的优先级
+_MOCK_PRIORITY = ("search", "outline", "edit")
+
+# 提示首个词直接指明任务时的快速查找表
+_FAST_MAP = {
+    "搜索": "search", "search": "search", "search_relevant_information": "search",
+    "大纲": "outline", "outline": "outline", "generate_structured_outline": "outline",
+    "编辑": "edit", "edit": "edit"
+}
+
 class LLMClient:
     """LLM客户端类，封装与LLM的交互"""
     
@@ -57,7 +108,8 @@ class LLMClient:
                  api_key: Optional[str] = None,
                  model: str = DEFAULT_LLM_MODEL,
                  temperature: float = LLM_TEMPERATURE,
-                 max_tokens: int = LLM_MAX_TOKENS):
+                 max_tokens: int = LLM_MAX_TOKENS,
+                 use_cache: Optional[bool] = None):
         """
         初始化LLM客户端
         
@@ -66,16 +118,19 @@ class LLMClient:
             model: 使用的模型名称
             temperature: 温度参数，控制随机性
             max_tokens: 最大生成令牌数
+            use_cache: 是否使用磁盘响应缓存，默认仅在温度为0时启用
         """
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.use_cache = temperature == 0 if use_cache is None else use_cache
         
         # 如果未提供API密钥，尝试从环境变量获取
         self.api_key = api_key or LLM_API_KEY
         
-        if OPENAI_AVAILABLE and self.api_key:
-            self.client = AsyncOpenAI(api_key=self.api_key)
+        async_openai = _load_openai() if self.api_key else None
+        if async_openai is not None:
+            self.client = async_openai(api_key=self.api_key)
             logger.info(f"已初始化OpenAI客户端，使用模型: {model}")
         else:
             self.client = None
@@ -102,6 +157,14 @@ class LLMClient:
         
         # 使用OpenAI客户端或模拟响应
         if self.client:
+            # 相同请求优先从磁盘缓存返回
+            cache_key = None
+            if self.use_cache:
+                cache_key = make_cache_key(self.model, self.temperature, self.max_tokens, messages)
+                cached = await asyncio.to_thread(default_cache.get, cache_key)
+                if cached is not None:
+                    return cached
+            
             try:
                 response = await self.client.chat.completions.create(
                     model=self.model,
@@ -109,7 +172,10 @@ class LLMClient:
                     temperature=self.temperature,
                     max_tokens=self.max_tokens
                 )
-                return response.choices[0].message.content
+                content = response.choices[0].message.content
+                if cache_key is not None and content is not None:
+                    await asyncio.to_thread(default_cache.set, cache_key, content, self.model)
+                return content
             except Exception as e:
                 logger.error(f"OpenAI API调用失败: {str(e)}")
                 # 发生错误时回退到模拟响应
@@ -154,59 +220,111 @@ class LLMClient:
             except Exception as e:
                 logger.error(f"OpenAI流式API调用失败: {str(e)}")
                 # 发生错误时回退到模拟流式响应
-                mock_response = self._get_mock_response(prompt)
-                # 如果是字符串，分段返回
-                if isinstance(mock_response, str):
-                    for i in range(0, len(mock_response), 5):
-                        yield mock_response[i:i+5]
-                        await asyncio.sleep(0.1)
-                else:
-                    # 如果是对象，返回JSON字符串
-                    mock_str = json.dumps(mock_response, ensure_ascii=False)
-                    for i in range(0, len(mock_str), 5):
-                        yield mock_str[i:i+5]
-                        await asyncio.sleep(0.1)
+                async for part in self._stream_mock_response(prompt):
+                    yield part
         else:
             # 使用模拟流式响应
-            mock_response = self._get_mock_response(prompt)
-            # 如果是字符串，分段返回
-            if isinstance(mock_response, str):
-                for i in range(0, len(mock_response), 5):
-                    yield mock_response[i:i+5]
-                    await asyncio.sleep(0.1)
-            else:
-                # 如果是对象，返回JSON字符串
-                mock_str = json.dumps(mock_response, ensure_ascii=False)
-                for i in range(0, len(mock_str), 5):
-                    yield mock_str[i:i+5]
-                    await asyncio.sleep(0.1)
+            async for part in self._stream_mock_response(prompt):
+                yield part
+    
+    async def _stream_mock_response(self, prompt: str):
+        """分段返回模拟响应"""
+        mock_response = self._get_mock_response(prompt)
+        for i in range(0, len(mock_response), _MOCK_CHUNK):
+            yield mock_response[i:i+_MOCK_CHUNK]
+            if _MOCK_STREAM_DELAY:
+                await asyncio.sleep(_MOCK_STREAM_DELAY)
     
-    def _get_mock_response(self, prompt: str) -> Union[str, Dict]:
+    def _get_mock_response(self, prompt: str) -> str:
         """根据提示选择合适的模拟响应"""
-        prompt_lower = prompt.lower()
+        head = prompt[:64].split(maxsplit=1)
+        kind = _FAST_MAP.get(head[0].lower()) if head else None
+        if kind:
+            return _MOCK_TEXT[kind]
         
-        if "搜索" in prompt_lower or "search" in prompt_lower:
-            return MOCK_RESPONSES["search"]
-        elif "大纲" in prompt_lower or "outline" in prompt_lower:
-            return MOCK_RESPONSES["outline"]
-        elif "编辑" in prompt_lower or "edit" in prompt_lower:
-            return MOCK_RESPONSES["edit"]
-        else:
-            return MOCK_RESPONSES["write"]
+        kinds = {_MOCK_DISPATCH[m.lower()] for m in _MOCK_RE.findall(prompt[:_MOCK_SCAN_LIMIT])}
+        for kind in _MOCK_PRIORITY:
+            if kind in kinds:
+                return _MOCK_TEXT[kind]
+        return _MOCK_TEXT["write"]
 
-# 创建默认LLM客户端实例
-default_llm_client = LLMClient()
+# 按参数缓存的LLM客户端，复用底层连接池
+# 按事件循环缓存客户端：OpenAI客户端的连接池绑定在首次使用它的事件循环上，
+# 不能跨循环复用（例如多次asyncio.run，或后台桥接循环与调用方的循环）
+_client_cache: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, LLMClient]]" = weakref.WeakKeyDictionary()
+
+def _get_client(
+    model: str = DEFAULT_LLM_MODEL,
+    temperature: float = LLM_TEMPERATURE,
+    max_tokens: int = LLM_MAX_TOKENS,
+    api_key: Optional[str] = None,
+    use_cache: Optional[bool] = None
+) -> LLMClient:
+    """获取当前事件循环共享的LLM客户端
+    
+    同一事件循环内相同参数的调用复用同一个客户端，避免每次请求重新建立连接
+    必须在运行中的事件循环内调用
+    
+    Args:
+        model: 模型名称
+        temperature: 温度参数
+        max_tokens: 最大生成token数
+        api_key: OpenAI API密钥，如果为None则使用环境变量
+        use_cache: 是否使用磁盘响应缓存，None表示仅在温度为0时启用
+        
+    Returns:
+        LLM客户端
+    """
+    loop = asyncio.get_running_loop()
+    clients = _client_cache.get(loop)
+    if clients is None:
+        # 清理已关闭循环的客户端，客户端可能反向引用循环，弱引用无法自动回收
+        for closed in [other for other in _client_cache if other.is_closed()]:
+            del _client_cache[closed]
+        clients = _client_cache[loop] = {}
+    
+    key = (model, temperature, max_tokens, api_key or LLM_API_KEY, use_cache)
+    client = clients.get(key)
+    if client is None:
+        client = LLMClient(
+            api_key=api_key,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_cache=use_cache
+        )
+        clients[key] = client
+    return client
+
+async def aclose() -> None:
+    """关闭当前事件循环缓存的LLM客户端，释放连接池"""
+    clients = _client_cache.pop(asyncio.get_running_loop(), {})
+    for llm_client in clients.values():
+        if llm_client.client is not None:
+            await llm_client.client.close()
+
+def get_default_client() -> LLMClient:
+    """获取当前事件循环中使用默认参数的LLM客户端
+    
+    首次调用时才创建客户端（并按需导入OpenAI库），必须在运行中的事件循环内调用
+    
+    Returns:
+        LLM客户端
+    """
+    return _get_client()
 
 async def generate_text(
     prompt: str,
     system_message: Optional[str] = None,
     model: str = DEFAULT_LLM_MODEL,
     temperature: float = LLM_TEMPERATURE,
-    max_tokens: int = LLM_MAX_TOKENS
+    max_tokens: int = LLM_MAX_TOKENS,
+    use_cache: Optional[bool] = None
 ) -> str:
     """生成文本
     
-    使用LLM生成文本
+    使用LLM生成文本。磁盘响应缓存默认只在温度为0时启用，
+    默认温度(LLM_TEMPERATURE=0.7)下需要传入use_cache=True才会读写缓存
     
     Args:
         prompt: 用户提示
@@ -214,16 +332,13 @@ async def generate_text(
         model: 模型名称
         temperature: 温度参数
         max_tokens: 最大生成token数
+        use_cache: 是否使用磁盘响应缓存，None表示仅在温度为0时启用
         
     Returns:
         生成的文本
     """
-    # 创建LLM客户端
-    client = LLMClient(
-        model=model,
-        temperature=temperature,
-        max_tokens=max_tokens
-    )
+    # 获取共享的LLM客户端
+    client = _get_client(model, temperature, max_tokens, use_cache=use_cache)
     
     # 生成响应
     return await client.generate(prompt, system_message)
@@ -251,29 +366,26 @@ async def generate_streaming(
     Returns:
         完整的生成文本
     """
-    # 创建LLM客户端
-    client = LLMClient(
-        model=model,
-        temperature=temperature,
-        max_tokens=max_tokens
-    )
+    # 获取共享的LLM客户端
+    client = _get_client(model, temperature, max_tokens)
     
-    # 存储完整响应
-    full_response = ""
+    # 写入缓冲区，结束时一次取出完整响应
+    buf = io.StringIO()
     
     # 生成流式响应
     async for chunk in client.generate_with_streaming(prompt, system_message):
         callback(chunk)
-        full_response += chunk
+        buf.write(chunk)
         
-    return full_response
+    return buf.getvalue()
 
 def generate_text_sync(
     prompt: str,
     system_message: Optional[str] = None,
     model: str = DEFAULT_LLM_MODEL,
     temperature: float = LLM_TEMPERATURE,
-    max_tokens: int = LLM_MAX_TOKENS
+    max_tokens: int = LLM_MAX_TOKENS,
+    use_cache: Optional[bool] = None
 ) -> str:
     """同步生成文本
     
@@ -285,28 +397,23 @@ def generate_text_sync(
         model: 模型名称
         temperature: 温度参数
         max_tokens: 最大生成token数
+        use_cache: 是否使用磁盘响应缓存，None表示仅在温度为0时启用
         
     Returns:
         生成的文本
     """
-    # 创建事件循环
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
-    try:
-        # 运行异步函数
-        return loop.run_until_complete(
-            generate_text(
-                prompt, 
-                system_message, 
-                model, 
-                temperature, 
-                max_tokens
-            )
-        )
-    finally:
-        # 关闭事件循环
-        loop.close()
+    # 提交到常驻的后台事件循环，复用其中的客户端连接池
+    return run_sync(
+        generate_text(
+            prompt, 
+            system_message, 
+            model, 
+            temperature, 
+            max_tokens,
+            use_cache
+        ),
+        timeout=LLM_API_TIMEOUT + 5
+    )
 
 async def test_llm():
     """测试LLM功能"""
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+多代理协作故事生成器项目 - LLM响应缓存
+持久化保存LLM响应，相同的请求直接从磁盘返回
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import List, Dict, Any, Optional
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logging import get_logger
+logger = get_logger(__name__)
+
+# 缓存配置
+LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", os.path.expanduser("~/.cache/a2a_llm"))
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", str(7 * 86400)))  # 秒
+
+def make_cache_key(model: str,
+                   temperature: float,
+                   max_tokens: int,
+                   messages: List[Dict[str, Any]]) -> str:
+    """根据请求参数生成缓存键
+
+    Args:
+        model: 模型名称
+        temperature: 温度参数
+        max_tokens: 最大生成token数
+        messages: 消息列表
+
+    Returns:
+        缓存键
+    """
+    payload = json.dumps(
+        {"m": model, "t": temperature, "mt": max_tokens, "msgs": messages},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.blake2b(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """基于SQLite的LLM响应缓存
+
+    每条记录同时保存模型名称和写入时间，便于排查和按模型清理
+    缓存读写失败只记录警告，不影响正常的LLM调用
+    """
+
+    def __init__(self, directory: str = LLM_CACHE_DIR, ttl: int = LLM_CACHE_TTL):
+        """初始化缓存
+
+        Args:
+            directory: 缓存目录
+            ttl: 缓存有效期(秒)
+        """
+        self.path = os.path.join(directory, "responses.sqlite3")
+        self.ttl = ttl
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库连接（首次使用时创建）"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, model TEXT, "
+                "created REAL NOT NULL, expires REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存的响应
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的响应文本，未命中或已过期时返回None
+        """
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT value, expires FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"读取LLM缓存失败: {str(e)}")
+            return None
+
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def set(self, key: str, value: str, model: Optional[str] = None) -> None:
+        """写入响应
+
+        Args:
+            key: 缓存键
+            value: 响应文本
+            model: 生成该响应的模型名称
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, model, created, expires) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, model, now, now + self.ttl)
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"写入LLM缓存失败: {str(e)}")
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# 默认缓存实例，首次使用时才创建数据库文件
+default_cache = LLMResponseCache()
@@ -7,9 +7,12 @@
 import logging
 import sys
 import os
+import queue
+import atexit
+import threading
 from datetime import datetime
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import functools
 
 # 导入配置
@@ -23,21 +26,46 @@ if LOG_FILE:
         os.makedirs(log_dir, exist_ok=True)
 
 # 将字符串日志级别转换为logging常量
-LOG_LEVELS = {
-    "DEBUG": logging.DEBUG,
-    "INFO": logging.INFO,
-    "WARNING": logging.WARNING,
-    "ERROR": logging.ERROR,
-    "CRITICAL": logging.CRITICAL
-}
-LOGGING_LEVEL = LOG_LEVELS.get(LOG_LEVEL.upper(), logging.INFO)
+LOGGING_LEVEL = getattr(logging, LOG_LEVEL.upper(), None)
+if not isinstance(LOGGING_LEVEL, int):
+    LOGGING_LEVEL = logging.INFO
+elif LOGGING_LEVEL == logging.NOTSET:
+    # 记录器不向上传播，NOTSET会退回根记录器的WARNING级别，这里按"全部记录"处理
+    LOGGING_LEVEL = logging.DEBUG
 
 # 全局日志格式
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 formatter = logging.Formatter(LOG_FORMAT)
 
-# 缓存记录器实例
-loggers = {}
+# 保护记录器的首次配置，避免并发时重复添加处理程序
+_setup_lock = threading.Lock()
+
+# 控制台处理程序
+_console_handler = logging.StreamHandler()
+_console_handler.setFormatter(formatter)
+_handlers = [_console_handler]
+
+# 文件处理程序（如果配置了日志文件）
+_file_error = None
+if LOG_FILE:
+    try:
+        _file_handler = RotatingFileHandler(
+            LOG_FILE, 
+            maxBytes=10*1024*1024,  # 10MB
+            backupCount=5
+        )
+        _file_handler.setFormatter(formatter)
+        _handlers.append(_file_handler)
+    except Exception as e:
+        # 如果无法写入日志文件，仅记录到控制台
+        _console_handler.setLevel(logging.WARNING)
+        _file_error = e
+
+# 所有记录器共用一个队列，由后台监听线程完成格式化、写出和文件轮转，避免阻塞事件循环
+_log_queue = queue.SimpleQueue()
+_listener = QueueListener(_log_queue, *_handlers, respect_handler_level=True)
+_listener.start()
+atexit.register(_listener.stop)
 
 def get_logger(name):
     """获取指定名称的日志记录器
@@ -48,46 +76,28 @@ def get_logger(name):
     Returns:
         日志记录器实例
     """
-    # 如果已经创建过该记录器，直接返回
-    if name in loggers:
-        return loggers[name]
-        
-    # 创建日志记录器
+    # logging.getLogger本身按名称缓存记录器
     logger = logging.getLogger(name)
-    logger.setLevel(LOGGING_LEVEL)
-    
-    # 避免重复处理程序
-    if logger.handlers:
+    if getattr(logger, "_a2a_configured", False):
         return logger
-        
-    # 添加控制台处理程序
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
     
-    # 添加文件处理程序（如果配置了日志文件）
-    if LOG_FILE:
-        try:
-            file_handler = RotatingFileHandler(
-                LOG_FILE, 
-                maxBytes=10*1024*1024,  # 10MB
-                backupCount=5
-            )
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-        except Exception as e:
-            # 如果无法写入日志文件，仅记录到控制台
-            console_handler.setLevel(logging.WARNING)
-            logger.warning(f"无法写入日志文件 {LOG_FILE}: {str(e)}")
-        
-    # 缓存记录器实例
-    loggers[name] = logger
+    with _setup_lock:
+        # 避免重复处理程序
+        if not getattr(logger, "_a2a_configured", False):
+            logger.setLevel(LOGGING_LEVEL)
+            # 记录器只把日志放入共享队列
+            logger.addHandler(QueueHandler(_log_queue))
+            logger.propagate = False
+            logger._a2a_configured = True
     
     return logger
 
 # 应用默认日志记录器
 logger = get_logger('app')
 
+if _file_error:
+    logger.warning(f"无法写入日志文件 {LOG_FILE}: {str(_file_error)}")
+
 def log_function_call(func):
     """装饰器：记录函数调用
     
@@ -99,20 +109,23 @@ def log_function_call(func):
     Returns:
         装饰后的函数
     """
+    # 在装饰时绑定记录器和函数名，调用时无需再查找
+    logger = get_logger(func.__module__)
+    func_name = func.__name__
+    
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        module_name = func.__module__
-        func_name = func.__name__
-        logger = get_logger(module_name)
-        
-        logger.debug(f"调用函数 {func_name}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("调用函数 %s", func_name)
         
         try:
             result = func(*args, **kwargs)
-            logger.debug(f"函数 {func_name} 完成")
+            if debug:
+                logger.debug("函数 %s 完成", func_name)
             return result
         except Exception as e:
-            logger.exception(f"函数 {func_name} 异常: {str(e)}")
+            logger.exception("函数 %s 异常: %s", func_name, e)
             raise
             
     return wrapper
@@ -128,20 +141,23 @@ def log_async_function_call(func):
     Returns:
         装饰后的异步函数
     """
+    # 在装饰时绑定记录器和函数名，调用时无需再查找
+    logger = get_logger(func.__module__)
+    func_name = func.__name__
+    
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
-        module_name = func.__module__
-        func_name = func.__name__
-        logger = get_logger(module_name)
-        
-        logger.debug(f"调用异步函数 {func_name}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("调用异步函数 %s", func_name)
         
         try:
             result = await func(*args, **kwargs)
-            logger.debug(f"异步函数 {func_name} 完成")
+            if debug:
+                logger.debug("异步函数 %s 完成", func_name)
             return result
         except Exception as e:
-            logger.exception(f"异步函数 {func_name} 异常: {str(e)}")
+            logger.exception("异步函数 %s 异常: %s", func_name, e)
             raise
             
     return wrapper
@@ -4,39 +4,165 @@
 提供任务进度跟踪和报告功能
 """
 
-import os
-import sys
 import time
+import queue
+import atexit
+import asyncio
 import threading
-from typing import Dict, Any, Optional, Callable
+from collections import deque
+from collections.abc import Mapping
+from typing import Dict, List, Any, Optional, Callable, Tuple
 
-# 添加项目根目录到路径
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.logging import get_logger
+if __package__:
+    from .logging import get_logger
+else:
+    # 直接作为脚本运行时，添加项目根目录到路径
+    import os
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# 任务的终止状态
+_TERMINAL = frozenset({"completed", "failed", "canceled"})
+
+# 订阅者通知队列，由后台分发线程批量处理
+# 订阅者回调因此运行在"progress-notify"线程中，而不是调用update的线程或事件循环中
+_notify_queue = queue.SimpleQueue()
+_NOTIFY_BATCH_WINDOW = 0.02  # 秒
+_dispatcher: Optional[threading.Thread] = None
+_dispatcher_lock = threading.Lock()
+
+def _dispatch_notifications() -> None:
+    """后台分发线程：收集一小段时间内的通知，同一任务只保留最新一条后回调订阅者"""
+    while True:
+        batch = [_notify_queue.get()]
+        time.sleep(_NOTIFY_BATCH_WINDOW)
+        while True:
+            try:
+                batch.append(_notify_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        # 带额外数据的通知不合并；合并的通知移到最新位置，保持先后顺序
+        latest = {}
+        markers = []
+        for item in batch:
+            task, subs, data, coalesce = item
+            if task is None:
+                # flush()放入的标记，本批通知分发完后再通知等待方
+                markers.append(data)
+                continue
+            key = id(task) if coalesce else object()
+            latest.pop(key, None)
+            latest[key] = item
+            
+        for task, subs, data, _ in latest.values():
+            try:
+                task._notify_subscribers_unlocked(subs, data)
+            except Exception as e:
+                logger.error("分发进度通知出错: %s", e)
+        
+        for done in markers:
+            done.set()
+
+def flush(timeout: Optional[float] = 1.0) -> bool:
+    """等待已排队的进度通知全部分发给订阅者
+    
+    进程退出时自动调用，避免最后的状态变化（如completed）随后台线程一起丢失
+    
+    Args:
+        timeout: 最长等待时间(秒)，None表示一直等待
+        
+    Returns:
+        是否在超时前分发完毕
+    """
+    if _dispatcher is None:
+        return True
+    if threading.current_thread() is _dispatcher:
+        # 订阅者回调中调用时无法等待自身
+        return False
+    done = threading.Event()
+    _notify_queue.put((None, None, done, False))
+    return done.wait(timeout)
+
+atexit.register(flush)
+
+def _schedule_notification(task: "TaskProgress", 
+                           subs: Tuple[Callable[[Dict[str, Any]], None], ...], 
+                           data: Dict[str, Any],
+                           coalesce: bool = True) -> None:
+    """将通知放入队列，由后台线程回调订阅者
+    
+    Args:
+        task: 任务进度跟踪器
+        subs: 订阅者快照
+        data: 通知数据
+        coalesce: 是否允许与同一任务的后续通知合并
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = threading.Thread(
+                    target=_dispatch_notifications, 
+                    name="progress-notify", 
+                    daemon=True
+                )
+                _dispatcher.start()
+    _notify_queue.put((task, subs, data, coalesce))
+
 class TaskProgress:
     """任务进度跟踪器"""
     
-    def __init__(self, task_id: str, total_steps: int = 100):
+    __slots__ = (
+        "task_id", "total_steps", "_inv_total", "_template",
+        "min_interval_s", "min_progress_delta",
+        "current_step", "progress", "status", "message",
+        "start_time", "last_update_time", "_last_notify_time", "_notified_progress",
+        "complete_time", "_wall_offset",
+        "_history",
+        "subscribers", "lock"
+    )
+    
+    def __init__(self, 
+                 task_id: str, 
+                 total_steps: int = 100,
+                 min_interval_s: float = 0.05,
+                 min_progress_delta: float = 0.5):
         """初始化进度跟踪器
         
         Args:
             task_id: 任务ID
             total_steps: 总步数
+            min_interval_s: 两次通知之间的最小间隔(秒)，间隔内的小幅进度变化不通知订阅者
+            min_progress_delta: 触发通知的最小进度变化(百分点)
         """
         self.task_id = task_id
         self.total_steps = total_steps
+        # 不变的部分预先计算
+        self._inv_total = 100.0 / total_steps if total_steps else 0.0
+        self._template = {"task_id": task_id, "total_steps": total_steps}
+        self.min_interval_s = min_interval_s
+        self.min_progress_delta = min_progress_delta
         self.current_step = 0
         self.progress = 0.0
         self.status = "pending"
         self.message = ""
-        self.start_time = time.time()
+        # 内部时间使用单调时钟，不受系统时间调整影响；对外导出时换算为墙上时间
+        self.start_time = time.monotonic()
+        self._wall_offset = time.time() - self.start_time
         self.last_update_time = self.start_time
+        # 上次通知订阅者的时间和进度，用于限流
+        self._last_notify_time = self.start_time
+        self._notified_progress = 0.0
         self.complete_time = None
-        self.subscribers = []
-        self.lock = threading.RLock()
+        # 最近的(时间, 进度)样本，用于平滑估计剩余时间
+        self._history: deque = deque(maxlen=16)
+        # 以回调本身为键的有序字典，成员判断和删除都是O(1)
+        self.subscribers: Dict[Callable[[Dict[str, Any]], None], None] = {}
+        self.lock = threading.Lock()
     
     def update(self, 
                step: Optional[int] = None, 
@@ -53,109 +179,185 @@ class TaskProgress:
             message: 状态消息
             extra_data: 额外数据
         """
+        now = time.monotonic()
+        new_progress = self.progress
+        
+        # 根据步骤计算进度
+        if step is not None:
+            if step < 0:
+                step = 0
+            elif step > self.total_steps:
+                step = self.total_steps
+            new_progress = step * self._inv_total
+            
+        # 直接更新进度
+        if progress is not None:
+            if progress < 0:
+                progress = 0
+            elif progress > 100:
+                progress = 100
+            new_progress = progress
+        
+        # 数值字段和消息直接赋值，CPython中单次属性赋值是原子的，无需加锁
+        if step is not None:
+            self.current_step = step
+        self.progress = new_progress
+        self.last_update_time = now
+        self._history.append((now, new_progress))
+        
+        # 距上次通知很近且进度变化很小的纯进度更新，只记录数值和时间，不通知订阅者
+        if (status is None and message is None and extra_data is None
+                and now - self._last_notify_time < self.min_interval_s
+                and abs(new_progress - self._notified_progress) < self.min_progress_delta):
+            return
+        self._notified_progress = new_progress
+        self._last_notify_time = now
+            
+        # 更新消息
+        if message:
+            self.message = message
+        
+        # 没有状态变化也没有订阅者时，无需加锁
+        if not status and not self.subscribers:
+            return
+        
         with self.lock:
-            # 更新步骤
-            if step is not None:
-                if step < 0:
-                    step = 0
-                elif step > self.total_steps:
-                    step = self.total_steps
-                self.current_step = step
-                self.progress = (step / self.total_steps) * 100
-                
-            # 直接更新进度
-            if progress is not None:
-                if progress < 0:
-                    progress = 0
-                elif progress > 100:
-                    progress = 100
-                self.progress = progress
-                
             # 更新状态
             if status:
                 old_status = self.status
                 self.status = status
                 
                 # 如果任务完成，记录完成时间
-                if status in ["completed", "failed", "canceled"] and old_status not in ["completed", "failed", "canceled"]:
-                    self.complete_time = time.time()
+                if status in _TERMINAL and old_status not in _TERMINAL:
+                    self.complete_time = self.last_update_time
                     
                 # 如果任务从完成状态变回运行状态，重置完成时间
-                if status == "running" and old_status in ["completed", "failed", "canceled"]:
+                if status == "running" and old_status in _TERMINAL:
                     self.complete_time = None
             
-            # 更新消息
-            if message:
-                self.message = message
-                
-            # 更新时间
-            self.last_update_time = time.time()
-            
             # 通知订阅者
-            update_data = {
-                "task_id": self.task_id,
-                "progress": self.progress,
-                "status": self.status,
-                "message": self.message,
-                "current_step": self.current_step,
-                "total_steps": self.total_steps,
-                "time": self.last_update_time
-            }
+            update_data = self._update_data()
             
             # 添加额外数据
             if extra_data:
                 update_data.update(extra_data)
-                
-            self._notify_subscribers(update_data)
+            
+            # 在锁内取订阅者快照，释放锁后由后台线程回调，避免慢回调阻塞更新
+            subs = tuple(self.subscribers)
+            
+        if subs:
+            _schedule_notification(self, subs, update_data, coalesce=not extra_data)
+    
+    def _fast_update_pm(self, progress: float, message: Optional[str] = None) -> None:
+        """只更新进度和消息的快速路径
+        
+        供已处于running状态的任务使用，省去步骤、状态转换、额外数据和限流的判断
+        
+        Args:
+            progress: 进度百分比(0-100)
+            message: 状态消息
+        """
+        progress = 0 if progress < 0 else 100 if progress > 100 else progress
+        self.progress = progress
+        self._notified_progress = progress
+        if message:
+            self.message = message
+        self.last_update_time = self._last_notify_time = now = time.monotonic()
+        self._history.append((now, progress))
+        
+        if not self.subscribers:
+            return
+        
+        with self.lock:
+            update_data = self._update_data()
+            subs = tuple(self.subscribers)
+            
+        if subs:
+            _schedule_notification(self, subs, update_data)
+    
+    def _update_data(self) -> Dict[str, Any]:
+        """构建通知数据，调用方需持有锁
+        
+        Returns:
+            通知数据
+        """
+        update_data = self._template.copy()
+        update_data.update(
+            progress=self.progress,
+            status=self.status,
+            message=self.message,
+            current_step=self.current_step,
+            time=self.last_update_time + self._wall_offset
+        )
+        return update_data
     
     def get_progress(self) -> Dict[str, Any]:
         """获取当前进度
         
         Returns:
-            进度信息
+            进度信息字典，可以直接序列化或修改
+        """
+        return self.get_progress_view().as_dict()
+    
+    def get_progress_view(self) -> "ProgressView":
+        """获取当前进度的只读快照
+        
+        只需要读取少数字段时使用，派生字段在访问时才计算
+        
+        Returns:
+            进度快照
         """
         with self.lock:
-            # 计算耗时
-            elapsed = self.last_update_time - self.start_time
-            
-            # 如果未完成，计算预计剩余时间
-            remaining = None
-            if self.status == "running" and self.progress > 0:
-                rate = elapsed / self.progress
-                remaining = rate * (100 - self.progress)
-                
-            # 如果已完成，计算总耗时
-            total_time = None
-            if self.complete_time:
-                total_time = self.complete_time - self.start_time
+            return self._get_progress_unlocked()
+    
+    def _get_progress_unlocked(self) -> "ProgressView":
+        """获取当前进度，调用方需持有锁
+        
+        Returns:
+            进度快照
+        """
+        offset = self._wall_offset
+        
+        # 用最近样本首尾两点计算进度速率(百分点/秒)
+        rate = None
+        if len(self._history) >= 2:
+            (t_first, p_first), (t_last, p_last) = self._history[0], self._history[-1]
+            if t_last > t_first:
+                rate = (p_last - p_first) / (t_last - t_first)
                 
-            return {
-                "task_id": self.task_id,
-                "progress": self.progress,
-                "status": self.status,
-                "message": self.message,
-                "current_step": self.current_step,
-                "total_steps": self.total_steps,
-                "start_time": self.start_time,
-                "last_update_time": self.last_update_time,
-                "complete_time": self.complete_time,
-                "elapsed_time": elapsed,
-                "estimated_remaining": remaining,
-                "total_time": total_time
-            }
+        return ProgressView(
+            self.task_id,
+            self.progress,
+            self.status,
+            self.message,
+            self.current_step,
+            self.total_steps,
+            self.start_time + offset,
+            self.last_update_time + offset,
+            self.complete_time + offset if self.complete_time is not None else None,
+            rate
+        )
     
     def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
         """订阅进度更新
         
+        订阅时的当前状态在调用线程中回调，之后的更新在后台"progress-notify"线程中回调，
+        而不是在调用update的线程或事件循环中。短时间内同一任务的多次更新会被合并，
+        回调只收到其中最新的一次（带额外数据的更新除外），不应依赖每次更新都被送达。
+        回调需要自行保证线程安全，操作事件循环中的状态或asyncio对象时应通过
+        loop.call_soon_threadsafe或asyncio.run_coroutine_threadsafe转交给事件循环
+        
         Args:
             callback: 回调函数
         """
         with self.lock:
-            if callback not in self.subscribers:
-                self.subscribers.append(callback)
-                
-                # 立即通知当前状态
-                callback(self.get_progress())
+            if callback in self.subscribers:
+                return
+            self.subscribers[callback] = None
+            current = self._get_progress_unlocked()
+            
+        # 释放锁后立即通知当前状态
+        callback(current.as_dict())
     
     def unsubscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
         """取消订阅进度更新
@@ -164,30 +366,168 @@ class TaskProgress:
             callback: 回调函数
         """
         with self.lock:
-            if callback in self.subscribers:
-                self.subscribers.remove(callback)
+            self.subscribers.pop(callback, None)
     
-    def _notify_subscribers(self, data: Dict[str, Any]) -> None:
-        """通知所有订阅者
+    def _notify_subscribers_unlocked(self, 
+                                     subs: Tuple[Callable[[Dict[str, Any]], None], ...], 
+                                     data: Dict[str, Any]) -> None:
+        """在不持有锁的情况下通知订阅者
         
         Args:
+            subs: 订阅者快照
             data: 通知数据
         """
-        for callback in list(self.subscribers):
+        failed = []
+        for callback in subs:
             try:
                 callback(data)
             except Exception as e:
-                logger.error(f"调用进度更新回调出错: {str(e)}")
-                # 移除失败的订阅者
-                self.subscribers.remove(callback)
+                logger.error("调用进度更新回调出错: %s", e)
+                failed.append(callback)
+                
+        # 统一移除失败的订阅者
+        if failed:
+            with self.lock:
+                for callback in failed:
+                    self.subscribers.pop(callback, None)
+
+class ProgressView(Mapping):
+    """任务进度快照
+    
+    创建时只复制基本字段，耗时、预计剩余时间等派生字段在访问时计算。
+    实现只读映射接口（in、迭代、keys、len、dict(view)等），兼容原先返回字典的用法。
+    """
+    
+    __slots__ = (
+        "task_id", "progress", "status", "message", "current_step", "total_steps",
+        "start_time", "last_update_time", "complete_time", "_rate"
+    )
+    
+    KEYS = __slots__[:-1] + ("elapsed_time", "estimated_remaining", "total_time")
+    
+    def __init__(self, 
+                 task_id: str, 
+                 progress: float, 
+                 status: str, 
+                 message: str,
+                 current_step: int, 
+                 total_steps: int, 
+                 start_time: float, 
+                 last_update_time: float,
+                 complete_time: Optional[float],
+                 rate: Optional[float] = None):
+        """初始化进度快照"""
+        self.task_id = task_id
+        self.progress = progress
+        self.status = status
+        self.message = message
+        self.current_step = current_step
+        self.total_steps = total_steps
+        self.start_time = start_time
+        self.last_update_time = last_update_time
+        self.complete_time = complete_time
+        self._rate = rate
+    
+    @property
+    def elapsed_time(self) -> float:
+        """已耗时(秒)"""
+        return self.last_update_time - self.start_time
+    
+    @property
+    def estimated_remaining(self) -> Optional[float]:
+        """预计剩余时间(秒)，未运行或尚无进度时为None"""
+        if self.status == "running" and self.progress > 0:
+            # 优先使用最近样本的速率，样本不足时按整体平均速率估计
+            if self._rate is not None and self._rate > 0:
+                return (100 - self.progress) / self._rate
+            rate = self.elapsed_time / self.progress
+            return rate * (100 - self.progress)
+        return None
+    
+    @property
+    def total_time(self) -> Optional[float]:
+        """总耗时(秒)，未完成时为None"""
+        if self.complete_time is not None:
+            return self.complete_time - self.start_time
+        return None
+    
+    def __getitem__(self, key: str) -> Any:
+        """按键读取字段，兼容字典用法"""
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __contains__(self, key: object) -> bool:
+        """判断字段是否存在"""
+        return key in self.KEYS
+    
+    def __iter__(self):
+        """按固定顺序迭代字段名"""
+        return iter(self.KEYS)
+    
+    def __len__(self) -> int:
+        """字段数量"""
+        return len(self.KEYS)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """按键读取字段，不存在时返回默认值"""
+        return getattr(self, key) if key in self.KEYS else default
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """转换为字典
+        
+        Returns:
+            包含全部字段的进度信息
+        """
+        return {key: getattr(self, key) for key in self.KEYS}
 
 class ProgressTracker:
-    """进度跟踪管理器"""
+    """进度跟踪管理器
     
-    def __init__(self):
-        """初始化进度跟踪管理器"""
-        self.tasks = {}
-        self.lock = threading.RLock()
+    任务按ID的哈希分布到多个分片，每个分片有独立的字典和写锁。
+    查找任务只读取分片字典，不加锁（CPython中字典的单次读写是原子的）；
+    创建和移除任务只锁住所在分片。更新、订阅在任务自身的锁下进行，
+    不同任务之间互不阻塞。
+    """
+    
+    def __init__(self, num_shards: int = 16):
+        """初始化进度跟踪管理器
+        
+        Args:
+            num_shards: 分片数量
+        """
+        self._num_shards = num_shards
+        self._shards: List[Tuple[threading.Lock, Dict[str, TaskProgress]]] = [
+            (threading.Lock(), {}) for _ in range(num_shards)
+        ]
+        # 各分片的任务字典，供无锁查找直接索引，省去_shard()调用和元组解包
+        self._shard_tasks: List[Dict[str, TaskProgress]] = [tasks for _, tasks in self._shards]
+        # 直接写入任务或移除任务时调用，用于丢弃外部按任务保存的过时状态
+        self._write_hooks: List[Callable[[str, bool], None]] = []
+    
+    def add_write_hook(self, hook: Callable[[str, bool], None]) -> None:
+        """注册写入钩子
+        
+        Args:
+            hook: 回调函数，参数为任务ID和任务是否已结束（移除或进入终止状态）
+        """
+        self._write_hooks.append(hook)
+    
+    def _notify_write(self, task_id: str, finished: bool) -> None:
+        """通知钩子任务被直接写入"""
+        for hook in self._write_hooks:
+            hook(task_id, finished)
+    
+    def _shard(self, task_id: str) -> Tuple[threading.Lock, Dict[str, TaskProgress]]:
+        """获取任务所在的分片
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            分片的锁和任务字典
+        """
+        return self._shards[hash(task_id) % self._num_shards]
     
     def create_task(self, task_id: str, total_steps: int = 100) -> TaskProgress:
         """创建任务进度跟踪器
@@ -199,16 +539,17 @@ class ProgressTracker:
         Returns:
             任务进度跟踪器
         """
-        with self.lock:
-            if task_id in self.tasks:
+        lock, tasks = self._shard(task_id)
+        with lock:
+            if task_id in tasks:
                 # 如果任务已存在但已完成，重新创建
-                task = self.tasks[task_id]
-                if task.status in ["completed", "failed", "canceled"]:
-                    self.tasks[task_id] = TaskProgress(task_id, total_steps)
+                task = tasks[task_id]
+                if task.status in _TERMINAL:
+                    tasks[task_id] = TaskProgress(task_id, total_steps)
             else:
-                self.tasks[task_id] = TaskProgress(task_id, total_steps)
+                tasks[task_id] = TaskProgress(task_id, total_steps)
                 
-            return self.tasks[task_id]
+            return tasks[task_id]
     
     def get_task(self, task_id: str) -> Optional[TaskProgress]:
         """获取任务进度跟踪器
@@ -219,8 +560,7 @@ class ProgressTracker:
         Returns:
             任务进度跟踪器
         """
-        with self.lock:
-            return self.tasks.get(task_id)
+        return self._shard_tasks[hash(task_id) % self._num_shards].get(task_id)
     
     def remove_task(self, task_id: str) -> None:
         """移除任务进度跟踪器
@@ -228,9 +568,10 @@ class ProgressTracker:
         Args:
             task_id: 任务ID
         """
-        with self.lock:
-            if task_id in self.tasks:
-                del self.tasks[task_id]
+        lock, tasks = self._shard(task_id)
+        with lock:
+            tasks.pop(task_id, None)
+        self._notify_write(task_id, True)
     
     def update_progress(self, 
                         task_id: str, 
@@ -249,16 +590,18 @@ class ProgressTracker:
             message: 状态消息
             extra_data: 额外数据
         """
-        with self.lock:
-            task = self.get_task(task_id)
-            if task:
-                task.update(step, progress, status, message, extra_data)
-            else:
-                logger.warning(f"尝试更新不存在的任务: {task_id}")
+        task = self.get_task(task_id)
+        if task:
+            self._notify_write(task_id, status in _TERMINAL)
+            task.update(step, progress, status, message, extra_data)
+        else:
+            logger.warning("尝试更新不存在的任务: %s", task_id)
     
     def subscribe(self, task_id: str, callback: Callable[[Dict[str, Any]], None]) -> bool:
         """订阅任务进度更新
         
+        回调在后台分发线程中执行，且同一任务的更新可能被合并，见TaskProgress.subscribe
+        
         Args:
             task_id: 任务ID
             callback: 回调函数
@@ -266,14 +609,13 @@ class ProgressTracker:
         Returns:
             是否成功订阅
         """
-        with self.lock:
-            task = self.get_task(task_id)
-            if task:
-                task.subscribe(callback)
-                return True
-            else:
-                logger.warning(f"尝试订阅不存在的任务: {task_id}")
-                return False
+        task = self.get_task(task_id)
+        if task:
+            task.subscribe(callback)
+            return True
+        else:
+            logger.warning("尝试订阅不存在的任务: %s", task_id)
+            return False
     
     def unsubscribe(self, task_id: str, callback: Callable[[Dict[str, Any]], None]) -> bool:
         """取消订阅任务进度更新
@@ -285,18 +627,181 @@ class ProgressTracker:
         Returns:
             是否成功取消订阅
         """
-        with self.lock:
-            task = self.get_task(task_id)
-            if task:
-                task.unsubscribe(callback)
-                return True
-            else:
-                logger.warning(f"尝试取消订阅不存在的任务: {task_id}")
-                return False
+        task = self.get_task(task_id)
+        if task:
+            task.unsubscribe(callback)
+            return True
+        else:
+            logger.warning("尝试取消订阅不存在的任务: %s", task_id)
+            return False
+
+# 合并器的定时器及其所在的事件循环
+_Timer = Tuple[asyncio.AbstractEventLoop, asyncio.TimerHandle]
+
+class ProgressCoalescer:
+    """进度更新合并器
+    
+    在事件循环中运行时，运行中任务在flush_interval内的多次纯进度/消息更新只保留最后一次，
+    到期后统一写入进度跟踪器；状态变化和带额外数据的更新立即写入。
+    没有运行中的事件循环时直接写入。等待期间任务状态被其他写入改变时，丢弃过时的进度。
+    """
+    
+    TERMINAL_STATES = _TERMINAL
+    
+    def __init__(self, tracker: ProgressTracker, flush_interval: float = 0.1):
+        """初始化进度更新合并器
+        
+        Args:
+            tracker: 进度跟踪管理器
+            flush_interval: 同一任务两次写入之间的最小间隔(秒)
+        """
+        self.tracker = tracker
+        self.flush_interval = flush_interval
+        # 任务ID -> (进度, 消息, (事件循环, 定时器))，定时器为None表示尚未安排写出
+        self._pending: Dict[str, Tuple[float, str, Optional[_Timer]]] = {}
+        self._last_flush: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        tracker.add_write_hook(self._on_direct_write)
+    
+    def submit(self, 
+               task_id: str, 
+               progress: float, 
+               message: str = "", 
+               status: str = "running",
+               extra_data: Optional[Dict[str, Any]] = None) -> None:
+        """提交一次进度更新，不阻塞调用者
+        
+        Args:
+            task_id: 任务ID
+            progress: 进度百分比(0-100)
+            message: 状态消息
+            status: 状态
+            extra_data: 额外数据
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+            
+        terminal = status in self.TERMINAL_STATES
+        # 只合并运行中任务的纯进度/消息更新，状态变化必须立即生效，不能被延后的写入覆盖
+        task = self.tracker.get_task(task_id)
+        coalesce = (loop is not None and not extra_data and status == "running"
+                    and task is not None and task.status == "running")
+        if not coalesce:
+            with self._lock:
+                # 立即写入的更新会覆盖尚未写出的旧更新
+                self._drop_pending(task_id)
+                if terminal:
+                    self._last_flush.pop(task_id, None)
+                else:
+                    self._last_flush[task_id] = time.monotonic()
+            self._apply(task_id, progress, message, status, extra_data)
+            return
+            
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending.get(task_id)
+            timer = pending[2] if pending else None
+            # 定时器所在的循环已关闭时不会再触发，需要重新安排
+            if timer is not None and not timer[0].is_closed():
+                self._pending[task_id] = (progress, message, timer)
+                return
+            self._pending[task_id] = (progress, message, None)
+            delay = self._last_flush.get(task_id, 0.0) + self.flush_interval - now
+            if delay > 0:
+                timer = (loop, loop.call_later(delay, self.flush, task_id))
+                self._pending[task_id] = (progress, message, timer)
+                return
+            
+        self.flush(task_id)
+    
+    def flush(self, task_id: str) -> None:
+        """写出任务尚未写入的最新进度
+        
+        Args:
+            task_id: 任务ID
+        """
+        with self._lock:
+            pending = self._drop_pending(task_id)
+            if pending is None:
+                return
+            self._last_flush[task_id] = time.monotonic()
+            
+        progress, message, _ = pending
+        task = self.tracker.get_task(task_id)
+        # 等待期间任务已离开运行状态（例如被直接写入了新状态），这次进度已过时
+        if task is not None and task.status == "running":
+            task._fast_update_pm(progress, message)
+    
+    def flush_all(self) -> None:
+        """立即写出所有任务尚未写入的进度"""
+        with self._lock:
+            task_ids = list(self._pending)
+        for task_id in task_ids:
+            self.flush(task_id)
+    
+    def close(self) -> None:
+        """取消所有定时器并写出尚未写入的进度，在事件循环关闭前或进程退出时调用"""
+        self.flush_all()
+        with self._lock:
+            self._last_flush.clear()
+    
+    def forget(self, task_id: str) -> None:
+        """丢弃任务尚未写入的进度和写入记录
+        
+        Args:
+            task_id: 任务ID
+        """
+        with self._lock:
+            self._drop_pending(task_id)
+            self._last_flush.pop(task_id, None)
+    
+    def _on_direct_write(self, task_id: str, finished: bool) -> None:
+        """进度跟踪管理器被直接写入时调用：尚未写出的旧进度不能再覆盖这次写入
+        
+        Args:
+            task_id: 任务ID
+            finished: 任务是否已被移除或结束
+        """
+        if finished:
+            self.forget(task_id)
+        else:
+            with self._lock:
+                self._drop_pending(task_id)
+    
+    def _drop_pending(self, task_id: str) -> Optional[Tuple[float, str, Optional[_Timer]]]:
+        """移除任务尚未写入的进度并取消其定时器，调用方需持有锁"""
+        pending = self._pending.pop(task_id, None)
+        if pending is not None and pending[2] is not None:
+            pending[2][1].cancel()
+        return pending
+    
+    def _apply(self, task_id, progress, message, status, extra_data) -> None:
+        """写入进度跟踪器"""
+        # 最常见的情况：运行中的任务只更新进度和消息
+        if status == "running" and not extra_data:
+            task = self.tracker.get_task(task_id)
+            if task is not None and task.status == "running":
+                task._fast_update_pm(progress, message)
+                return
+                
+        self.tracker.update_progress(
+            task_id, 
+            progress=progress, 
+            status=status, 
+            message=message,
+            extra_data=extra_data
+        )
 
 # 全局进度跟踪管理器
 progress_tracker = ProgressTracker()
 
+# 全局进度更新合并器
+progress_coalescer = ProgressCoalescer(progress_tracker)
+# 先于通知队列的flush执行（atexit按注册的逆序调用），写出的进度还能送达订阅者
+atexit.register(progress_coalescer.close)
+
 def update_progress(
     task_id: str, 
     progress: float, 
@@ -306,6 +811,8 @@ def update_progress(
 ) -> None:
     """更新任务进度的便捷函数
     
+    在事件循环中调用时，高频更新会被合并后写入，终止状态立即写入
+    
     Args:
         task_id: 任务ID
         progress: 进度百分比(0-100)
@@ -313,13 +820,7 @@ def update_progress(
         status: 状态
         extra_data: 额外数据
     """
-    progress_tracker.update_progress(
-        task_id, 
-        progress=progress, 
-        status=status, 
-        message=message,
-        extra_data=extra_data
-    )
+    progress_coalescer.submit(task_id, progress, message, status, extra_data)
 
 def test_progress_tracker():
     """测试进度跟踪器"""
@@ -337,7 +838,11 @@ def test_progress_tracker():
     
     # 模拟任务进度
     print("开始模拟任务进度...")
+    # 按固定节拍推进，扣除每步自身耗时，避免误差累积
+    deadline = time.monotonic()
     for i in range(10):
+        deadline += 0.5
+        
         # 随机进度增量
         progress = (i + 1) * 10 + random.uniform(-3, 3)
         message = f"处理步骤 {i+1}/10"
@@ -345,8 +850,8 @@ def test_progress_tracker():
         # 更新进度
         update_progress(task_id, progress, message)
         
-        # 等待
-        time.sleep(0.5)
+        # 等待到下一个节拍
+        time.sleep(max(0.0, deadline - time.monotonic()))
         
     # 完成任务
     update_progress(task_id, 100, "任务完成", "completed")